@@ -16,8 +16,10 @@ class InstagramAdmin(AuthModelView, model=InstagramModel):
     column_details_list = [
         InstagramModel.user,
         InstagramModel.account_username,
+        InstagramModel.posts,
         InstagramModel.photo_urls,
         InstagramModel.created_at,
+        InstagramModel.last_seen_at,
     ]
 
     column_searchable_list = [
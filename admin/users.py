@@ -3,6 +3,8 @@ from admin.base import AuthModelView
 from db.models import InstagramModel
 from db.models._users import UserModel
 from admin.validators import check_email
+from services.users import invalidate_principal
+from utils.auth import get_password_hash_async
 
 
 class UserAdmin(AuthModelView, model=UserModel):
@@ -54,7 +56,18 @@ class UserAdmin(AuthModelView, model=UserModel):
     ]
 
     async def on_model_change(self, data: dict, model: UserModel, is_created: bool) -> None:
+        if new_password := data.get('new_password'):
+            # Hashing is slow, so it runs in the password executor and not in the form validation
+            data['hashed_password'] = await get_password_hash_async(new_password)
         if is_created:
             async with self.sessionmaker(expire_on_commit=False) as session:
                 await check_email(session, data['email'])
         return await super().on_model_change(data, model, is_created)
+
+    async def after_model_change(self, data: dict, model: UserModel, is_created: bool) -> None:
+        invalidate_principal(model.id)
+        return await super().after_model_change(data, model, is_created)
+
+    async def after_model_delete(self, model: UserModel) -> None:
+        invalidate_principal(model.id)
+        return await super().after_model_delete(model)
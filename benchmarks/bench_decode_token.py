@@ -0,0 +1,32 @@
+"""
+Throughput of decode_token with and without the claims cache.
+
+Run from the project root: python -m benchmarks.bench_decode_token [--count N]
+"""
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+from utils.auth import create_access_token, decode_token, get_token_cache
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--count', type=int, default=20000, help='decodes per run')
+args = parser.parse_args()
+
+
+def bench(name: str, before_each) -> float:
+    token = create_access_token({'token_type': 'access', 'user_id': 1}, expires_delta=timedelta(minutes=10))
+    started_at = time.perf_counter()
+    for _ in range(args.count):
+        before_each()
+        decode_token(token)
+    elapsed = time.perf_counter() - started_at
+    sys.stdout.write(f'{name:>9}: {args.count / elapsed:>10.0f} decodes/s, {elapsed / args.count * 1e6:.1f} us each\n')
+    return elapsed
+
+
+cache = get_token_cache()
+uncached = bench('uncached', cache.clear)
+cached = bench('cached', lambda: None)
+sys.stdout.write(f'speedup: {uncached / cached:.1f}x\n')
@@ -0,0 +1,49 @@
+# admin
+import sys
+import time
+import argparse
+import statistics
+
+# Local imports
+from settings import get_settings
+from utils.auth import pwd_context
+
+# bcrypt accepts 4..31 rounds, every round doubles the hashing time
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+parser = argparse.ArgumentParser(
+    description='Measures bcrypt hashing time on this machine and picks the rounds (BCRYPT_ROUNDS) '
+                'for a target login latency.',
+)
+parser.add_argument('--target-ms', type=float, default=250, help='hashing time of one password, milliseconds')
+parser.add_argument('--samples', type=int, default=5, help='hashes timed per rounds value, the median is used')
+args = parser.parse_args()
+
+
+def hash_time(rounds: int) -> float:
+    """ Median seconds of hashing one password with the rounds """
+    handler = pwd_context.handler('bcrypt').using(rounds=rounds)
+    durations = []
+    for _ in range(args.samples):
+        started_at = time.perf_counter()
+        handler.hash('calibration password')
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations)
+
+
+def main():
+    settings = get_settings()
+    target = args.target_ms / 1000
+    chosen = MIN_ROUNDS
+    sys.stdout.write(f'{"rounds":>6} {"ms":>9} {"logins/s":>9}  ({settings.password_workers} password workers)\n')
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = hash_time(rounds)
+        sys.stdout.write(f'{rounds:>6} {elapsed * 1000:>9.1f} {settings.password_workers / elapsed:>9.0f}\n')
+        if elapsed > target:
+            break
+        chosen = rounds
+    sys.stdout.write(f'\nBCRYPT_ROUNDS={chosen}  (currently {settings.bcrypt_rounds})\n')
+
+
+main()
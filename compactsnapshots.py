@@ -0,0 +1,99 @@
+# admin
+import sys
+import asyncio
+import argparse
+
+from sqlalchemy import select, update, delete
+
+# Local imports
+from db.models import InstagramModel, ScrapeJobModel
+from db.session import async_session
+from services.instagram import content_hash
+
+# Entries hashed per transaction
+BATCH_SIZE = 500
+
+parser = argparse.ArgumentParser(
+    description='Fills in content hashes of old snapshots and removes snapshots which repeat the previous one '
+                'of the same account taken for the same user, the kept snapshot takes over their last_seen_at.',
+)
+parser.add_argument('--dry-run', action='store_true', help='only count the snapshots which would be removed, '
+                                                          'content hashes are filled in anyway')
+args = parser.parse_args()
+
+
+async def fill_hashes() -> int:
+    """ Hashes of entries stored before content hashes existed """
+    filled = 0
+    last_id = 0
+    while True:
+        async with async_session() as session:
+            result = await session.execute(
+                select(InstagramModel)
+                .where(InstagramModel.content_hash.is_(None), InstagramModel.id > last_id)
+                .order_by(InstagramModel.id)
+                .limit(BATCH_SIZE)
+            )
+            entries = result.scalars().all()
+            if not entries:
+                return filled
+            for entry in entries:
+                entry.content_hash = content_hash(entry.urls)
+            last_id = entries[-1].id
+            filled += len(entries)
+            await session.commit()
+
+
+async def collapse_duplicates() -> int:
+    """ Removes entries equal to the previous entry of the account taken for the same user """
+    removed = 0
+    async with async_session() as session:
+        result = await session.execute(select(InstagramModel.user_id, InstagramModel.account_username).distinct())
+        histories = result.all()
+
+    for user_id, username in histories:
+        async with async_session() as session:
+            result = await session.execute(
+                select(InstagramModel.id, InstagramModel.content_hash, InstagramModel.last_seen_at)
+                .where(InstagramModel.user_id == user_id, InstagramModel.account_username == username)
+                .order_by(InstagramModel.created_at, InstagramModel.id)
+            )
+            kept_id = kept_hash = None
+            # Ids of removed entries by the id of the entry which replaces them
+            duplicates = {}
+            last_seen = {}
+            for entry_id, entry_hash, seen_at in result.all():
+                if kept_id is not None and entry_hash == kept_hash:
+                    duplicates.setdefault(kept_id, []).append(entry_id)
+                    if seen_at is not None:
+                        last_seen[kept_id] = max(last_seen.get(kept_id) or seen_at, seen_at)
+                else:
+                    kept_id, kept_hash = entry_id, entry_hash
+                    last_seen[kept_id] = seen_at
+            removed += sum(map(len, duplicates.values()))
+            if args.dry_run or not duplicates:
+                continue
+            for kept_id, duplicate_ids in duplicates.items():
+                await session.execute(
+                    update(ScrapeJobModel)
+                    .where(ScrapeJobModel.instagram_id.in_(duplicate_ids))
+                    .values(instagram_id=kept_id)
+                )
+                if last_seen[kept_id] is not None:
+                    await session.execute(
+                        update(InstagramModel)
+                        .where(InstagramModel.id == kept_id)
+                        .values(last_seen_at=last_seen[kept_id])
+                    )
+                await session.execute(delete(InstagramModel).where(InstagramModel.id.in_(duplicate_ids)))
+            await session.commit()
+    return removed
+
+
+async def async_main():
+    filled = await fill_hashes()
+    sys.stdout.write(f'Content hashes filled in: {filled}\n')
+    removed = await collapse_duplicates()
+    sys.stdout.write(f'Duplicate snapshots {"found" if args.dry_run else "removed"}: {removed}\n')
+
+asyncio.run(async_main())
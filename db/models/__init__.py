@@ -1,8 +1,13 @@
 from ._users import UserModel
-from ._instagram import InstagramModel
+from ._instagram import InstagramModel, InstagramPostModel, InstagramSnapshotPostModel
+from ._scrape_jobs import ScrapeJobModel, ScrapeJobStatus
 
 
 __all__ = [
     'UserModel',
-    'InstagramModel'
+    'InstagramModel',
+    'InstagramPostModel',
+    'InstagramSnapshotPostModel',
+    'ScrapeJobModel',
+    'ScrapeJobStatus',
 ]
@@ -1,15 +1,73 @@
 from sqlalchemy.orm import relationship, backref
-from sqlalchemy import Column, String, Integer, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
 
-from db.base import BaseModel
+from db.base import Base, BaseModel
 from db.models import UserModel
 
 
 class InstagramModel(BaseModel):
+    """ Snapshot of the photos of an account, taken by one scrape """
+
     __tablename__ = "instagram"
+    __table_args__ = (
+        # Scrape history and the latest snapshot of an account
+        Index('ix_instagram_account_username_created_at', 'account_username', 'created_at', 'id'),
+        # The latest snapshot of an account taken for a user, which a scrape without changes updates
+        Index('ix_instagram_user_id_account_username_created_at', 'user_id', 'account_username', 'created_at'),
+        # Answers containment (@>) queries, like snapshots with a photo URL
+        Index('ix_instagram_photo_urls', 'photo_urls', postgresql_using='gin',
+              postgresql_ops={'photo_urls': 'jsonb_path_ops'}),
+    )
 
     user_id: int = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    # History of a user is loaded only by queries which ask for it, the database deletes it with the user
     user: UserModel = relationship('UserModel', uselist=True, backref=backref(
-        'instagram_entries', cascade="all, delete-orphan", lazy='selectin'))
+        'instagram_entries', cascade="all, delete-orphan", lazy='select', passive_deletes=True))
     account_username: str = Column(String(100), nullable=True)
-    photo_urls = Column(JSON)
+    # Photo URLs of snapshots stored before posts were normalized, NULL for new snapshots
+    photo_urls = Column(JSONB(none_as_null=True))
+    # sha256 of the photo URLs in order, equal for snapshots with the same photos
+    content_hash: str = Column(String(64), nullable=True)
+    # Last scrape of the user which found these photos, a scrape without changes doesn't add a snapshot
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    posts = relationship(
+        'InstagramPostModel',
+        secondary='instagram_snapshot_post',
+        order_by='InstagramSnapshotPostModel.position',
+        lazy='selectin',
+        viewonly=True,
+    )
+
+    @property
+    def urls(self) -> list:
+        """ Photo URLs of the snapshot in profile order """
+        if self.photo_urls is not None:
+            return self.photo_urls
+        return [post.url for post in self.posts]
+
+
+class InstagramPostModel(BaseModel):
+    """ A post of an account, stored once however many snapshots contain it """
+
+    __tablename__ = "instagram_post"
+    __table_args__ = (
+        UniqueConstraint('account_username', 'shortcode'),
+    )
+
+    account_username: str = Column(String(100), nullable=False)
+    shortcode: str = Column(String(100), nullable=False, index=True)
+    url: str = Column(String(500), nullable=False)
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class InstagramSnapshotPostModel(Base):
+    """ Post of a snapshot at its position in the profile grid """
+
+    __tablename__ = "instagram_snapshot_post"
+
+    instagram_id: int = Column(Integer, ForeignKey('instagram.id', ondelete='CASCADE'), primary_key=True)
+    position: int = Column(Integer, primary_key=True)
+    post_id: int = Column(Integer, ForeignKey('instagram_post.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -0,0 +1,35 @@
+from enum import Enum
+
+from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+
+from db.base import BaseModel
+
+
+class ScrapeJobStatus(str, Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class ScrapeJobModel(BaseModel):
+    __tablename__ = "scrape_job"
+
+    user_id: int = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    account_username: str = Column(String(100), nullable=False)
+    max_count: int = Column(Integer, nullable=True)
+    force_refresh: bool = Column(Boolean, default=False, nullable=False)
+    backend: str = Column(String(20), nullable=True)
+    # Jobs with higher priority are taken first
+    priority: int = Column(Integer, default=0, nullable=False)
+
+    status: ScrapeJobStatus = Column(SQLEnum(ScrapeJobStatus, native_enum=False, length=20,
+                                             values_callable=lambda enum: [item.value for item in enum]),
+                                     default=ScrapeJobStatus.QUEUED, nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    error: str = Column(String(500), nullable=True)
+
+    instagram_id: int = Column(Integer, ForeignKey('instagram.id', ondelete='SET NULL'), nullable=True)
+    instagram_entry = relationship('InstagramModel', lazy='joined')
@@ -1,12 +1,19 @@
 from sqlalchemy.orm import validates
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import Column, String, Boolean, case
+from sqlalchemy import Column, String, Boolean, Index, case
 
 from db.base import BaseModel, validate_column
 
 
 class UserModel(BaseModel):
     __tablename__ = "user"
+    __table_args__ = (
+        # Keyset pagination of the users list, unfiltered and by status
+        Index('ix_user_created_at_id', 'created_at', 'id'),
+        Index('ix_user_is_active_created_at_id', 'is_active', 'created_at', 'id'),
+        # Email prefix filter, the unique index only answers equality with a non-C collation
+        Index('ix_user_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+    )
 
     # PERSONAL INFO
     email: str = Column(String(length=320), unique=True, index=True,
@@ -7,6 +7,7 @@ from db.session import engine
 from settings import get_settings
 from gql.users.types import LoginInput
 from services.users import login_admin, get_current_user
+from services.throttling import client_ip
 
 
 class AuthBackend(AuthenticationBackend):
@@ -15,8 +16,8 @@ class AuthBackend(AuthenticationBackend):
         username, password = form['username'], form['password']
         data = LoginInput(email=username, password=password)
         try:
-            async with AsyncSession(engine) as session:
-                result = await login_admin(data, session)
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                result = await login_admin(data, session, client_ip(request))
                 request.session.update(
                     {'token': f'{get_settings().jwt_header} {result}'}
                 )
@@ -35,7 +36,7 @@ class AuthBackend(AuthenticationBackend):
         if not token:
             return False
         try:
-            async with AsyncSession(engine) as session:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
                 result = await get_current_user(token.split()[-1], session)
             if isinstance(result, UserModel):
                 request.session.update({'user': {
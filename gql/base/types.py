@@ -1,5 +1,11 @@
+from typing import Generic, List, Optional, TypeVar
+
 import strawberry
 
+from utils.pagination import encode_cursor
+
+T = TypeVar('T')
+
 
 @strawberry.input
 class IDInput:
@@ -14,3 +20,33 @@ class MessageType:
 @strawberry.input
 class RefreshTokenInput:
     refresh_token: str
+
+
+# Pagination (Relay connections)
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: List[Edge[T]]
+    page_info: PageInfo
+
+    @classmethod
+    def from_page(cls, nodes: list, has_next_page: bool) -> 'Connection':
+        """ Connection of a page fetched by utils.pagination.fetch_page """
+        edges = [Edge(cursor=encode_cursor(node.created_at, node.id), node=node) for node in nodes]
+        return cls(
+            edges=edges,
+            page_info=PageInfo(has_next_page=has_next_page, end_cursor=edges[-1].cursor if edges else None),
+        )
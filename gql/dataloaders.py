@@ -0,0 +1,27 @@
+from functools import partial
+
+from strawberry.dataloader import DataLoader
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.users import get_by_ids
+from services.instagram import InstagramDatabaseService
+
+
+async def load_users(session: AsyncSession, user_ids: list) -> list:
+    """ Users of the batch with one query, None for users which don't exist """
+    users = await get_by_ids(session, list(user_ids))
+    return [users.get(user_id) for user_id in user_ids]
+
+
+async def load_instagram_entries(session: AsyncSession, user_ids: list) -> list:
+    """ Entries of every user in the batch with one query """
+    entries = await InstagramDatabaseService.get_user_entries(session, list(user_ids))
+    return [entries[user_id] for user_id in user_ids]
+
+
+def get_dataloaders(session: AsyncSession) -> dict:
+    """ Loaders of one request, they batch the lookups of nested fields and cache them for the request """
+    return {
+        'users': DataLoader(partial(load_users, session)),
+        'instagram_entries': DataLoader(partial(load_instagram_entries, session)),
+    }
@@ -14,6 +14,7 @@ class ExceptionEnum(Enum):
     TOKEN_EXPIRED = 'TOKEN_EXPIRED'
     UNPROCESSABLE_ENTITY = 'UNPROCESSABLE_ENTITY'
     RESOURCE_NOT_FOUND = 'RESOURCE_NOT_FOUND'
+    TOO_MANY_REQUESTS = 'TOO_MANY_REQUESTS'
 
 
 class GQLError(GraphQLError):
@@ -41,3 +42,13 @@ class AuthenticationError(GQLError):
 class FoundError(GQLError):
     message: str = 'Data couldn\'t be found'
     code: str = ExceptionEnum.RESOURCE_NOT_FOUND.value
+
+
+class TooManyRequestsError(GQLError):
+    message: str = 'Too many requests'
+    code: str = ExceptionEnum.TOO_MANY_REQUESTS.value
+
+    def __init__(self, explain=None, retry_after: int = 0, *args, **kwargs):
+        # Seconds until the next attempt is allowed
+        self.retry_after = retry_after
+        super().__init__(explain, *args, **kwargs)
@@ -0,0 +1,28 @@
+from typing import Any, Iterator
+
+from strawberry.extensions import SchemaExtension
+
+from utils.metrics import Timings, track
+
+
+class PhaseTimingsExtension(SchemaExtension):
+    """
+    Adds the seconds spent in each phase of the operation (driver checkout, page load, db commit...)
+    to the `extensions` of the response.
+    """
+
+    timings: Timings | None = None
+
+    def on_operation(self) -> Iterator[None]:
+        with track() as self.timings:
+            yield
+
+    def get_results(self) -> dict[str, Any]:
+        if self.timings is None:
+            return {}
+        return {
+            'timings': {
+                'total': round(self.timings.elapsed, 4),
+                'phases': self.timings.as_dict(),
+            },
+        }
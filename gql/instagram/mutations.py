@@ -0,0 +1,16 @@
+import strawberry
+from strawberry.types import Info
+
+from gql.permissions import IsAuthenticated
+from services.jobs import start_photo_scrape
+from gql.instagram.types import ScrapeJobInput, ScrapeJobType
+
+
+@strawberry.type
+class InstagramMutation:
+    @strawberry.mutation(
+        description='Queue scraping of photos, poll the result with scrapeJob',
+        permission_classes=[IsAuthenticated],
+    )
+    async def start_photo_scrape(self, info: Info, data: ScrapeJobInput) -> ScrapeJobType:
+        return await start_photo_scrape(info.context['session'], info.context['user'], data)
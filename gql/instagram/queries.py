@@ -1,10 +1,14 @@
+from typing import List, Optional
+
 import strawberry
 from strawberry.types import Info
 
-from gql.base.types import MessageType
+from gql.base.types import MessageType, Connection
 from gql.permissions import IsAuthenticated
-from services.instagram import InstagramScraper
-from gql.instagram.types import InstagramInput, InstagramType
+from services.jobs import ScrapeJobService
+from services.instagram import InstagramScraper, InstagramSearchService
+from gql.instagram.types import (InstagramInput, InstagramType, InstagramBatchInput, InstagramBatchItemType,
+                                 ScrapeJobType, PhotoSearchInput, InstagramEntryType)
 
 
 @strawberry.type
@@ -16,3 +20,33 @@ class InstagramQuery:
     async def get_photos(self, info: Info, data: InstagramInput) -> InstagramType | MessageType:
         scraper = InstagramScraper()
         return await scraper.get_photos(info.context['session'], info.context['user'], data)
+
+    @strawberry.field(
+        description='Getting list of photos for several accounts',
+        permission_classes=[IsAuthenticated],
+    )
+    async def get_photos_batch(self, info: Info, data: InstagramBatchInput) -> List[InstagramBatchItemType]:
+        scraper = InstagramScraper()
+        return await scraper.get_photos_batch(info.context['session'], info.context['user'], data)
+
+    @strawberry.field(
+        description='Getting status of a scrape job',
+        permission_classes=[IsAuthenticated],
+    )
+    async def scrape_job(self, info: Info, id: int) -> ScrapeJobType:
+        return await ScrapeJobService.get_job(info.context['session'], info.context['user'], id)
+
+    @strawberry.field(
+        description='Stored scrapes which contain a photo, newest first',
+        permission_classes=[IsAuthenticated],
+    )
+    async def search_photos(self, info: Info, data: PhotoSearchInput) -> List[InstagramEntryType]:
+        return await InstagramSearchService.search_photos(info.context['session'], data)
+
+    @strawberry.field(
+        description='Stored scrapes of an account, newest first',
+        permission_classes=[IsAuthenticated],
+    )
+    async def scrape_history(self, info: Info, username: str, first: Optional[int] = None,
+                             after: Optional[str] = None) -> Connection[InstagramEntryType]:
+        return await InstagramSearchService.get_scrape_history(info.context['session'], username, first, after)
@@ -0,0 +1,20 @@
+from typing import AsyncGenerator
+
+import strawberry
+from strawberry.types import Info
+
+from gql.permissions import IsAuthenticated
+from services.instagram import InstagramScraper
+from gql.instagram.types import InstagramInput, PhotoStreamEvent
+
+
+@strawberry.type
+class InstagramSubscription:
+    @strawberry.subscription(
+        description='Photos as they are found, followed by a summary',
+        permission_classes=[IsAuthenticated],
+    )
+    async def photo_stream(self, info: Info, data: InstagramInput) -> AsyncGenerator[PhotoStreamEvent, None]:
+        scraper = InstagramScraper()
+        async for event in scraper.stream_photos(info.context['session'], info.context['user'], data):
+            yield event
@@ -1,14 +1,134 @@
 import strawberry
+from strawberry.types import Info
 
-from typing import Optional, List
+from enum import Enum
+from datetime import datetime
+from typing import TYPE_CHECKING, Annotated, Optional, List
+
+from db.models import ScrapeJobStatus
+
+if TYPE_CHECKING:
+    from gql.users.types import UserType
+
+
+@strawberry.enum
+class ScraperBackendEnum(Enum):
+    """ Engines which can extract photos """
+
+    SELENIUM = 'selenium'
+    HTTP = 'http'
 
 
 @strawberry.input
 class InstagramInput:
     username: str
     max_count: Optional[int] = 10
+    force_refresh: Optional[bool] = False
+    backend: Optional[ScraperBackendEnum] = None
 
 
 @strawberry.type
 class InstagramType:
     urls: Optional[List[str]] = None
+
+
+@strawberry.input
+class InstagramBatchInput:
+    usernames: List[str]
+    max_count: Optional[int] = 10
+    force_refresh: Optional[bool] = False
+    backend: Optional[ScraperBackendEnum] = None
+
+
+@strawberry.type
+class InstagramBatchItemType:
+    username: str
+    urls: Optional[List[str]] = None
+    error: Optional[str] = None
+
+
+@strawberry.type
+class PhotoType:
+    """ Photo found by a running scrape """
+
+    url: str
+
+
+@strawberry.type
+class PhotoStreamSummaryType:
+    """ Last event of a photo stream """
+
+    username: str
+    count: int
+    # Photos came from a stored scrape
+    cached: bool
+    # Seconds since the subscription started
+    elapsed: float
+    error: Optional[str] = None
+
+
+PhotoStreamEvent = strawberry.union('PhotoStreamEvent', (PhotoType, PhotoStreamSummaryType))
+
+
+@strawberry.input
+class PhotoSearchInput:
+    # Photo URL or shortcode of the post
+    query: str
+    first: Optional[int] = 20
+
+
+@strawberry.type
+class InstagramEntryType:
+    """ Stored result of a scrape """
+
+    id: int
+    account_username: Optional[str]
+    created_at: Optional[datetime]
+    last_seen_at: Optional[datetime] = strawberry.field(
+        description='Time of the latest scrape of the user which found these photos')
+
+    @strawberry.field
+    def photo_urls(self) -> Optional[List[str]]:
+        return self.urls
+
+    @strawberry.field(description='User who requested the scrape')
+    async def user(self, info: Info) -> Optional[Annotated['UserType', strawberry.lazy('gql.users.types')]]:
+        return await info.context['dataloaders']['users'].load(self.user_id)
+
+
+# Scrape jobs
+
+
+ScrapeJobStatusEnum = strawberry.enum(ScrapeJobStatus, name='ScrapeJobStatusEnum')
+
+
+@strawberry.input
+class ScrapeJobInput(InstagramInput):
+    # Jobs with higher priority are taken first
+    priority: Optional[int] = 0
+
+
+@strawberry.type
+class ScrapeJobType:
+    id: int
+    account_username: str
+    max_count: Optional[int]
+    priority: int
+    status: ScrapeJobStatusEnum
+    error: Optional[str]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    instagram_entry: Optional[InstagramEntryType]
+
+    @strawberry.field(description='Seconds the job waited in the queue')
+    def wait_time(self) -> Optional[float]:
+        if self.created_at and self.started_at:
+            return (self.started_at - self.created_at).total_seconds()
+        return None
+
+    @strawberry.field(description='Seconds the job was running')
+    def run_time(self) -> Optional[float]:
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
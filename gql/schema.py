@@ -7,6 +7,10 @@ from gql.users.queries import UserQuery
 
 # GQL - Mutations
 from gql.users.mutations import UserMutation
+from gql.instagram.mutations import InstagramMutation
+
+# GQL - Subscriptions
+from gql.instagram.subscriptions import InstagramSubscription
 
 
 Query = merge_types(
@@ -21,5 +25,13 @@ Mutation = merge_types(
     name="Mutation",
     types=(
         UserMutation,
+        InstagramMutation,
+    ),
+)
+
+Subscription = merge_types(
+    name="Subscription",
+    types=(
+        InstagramSubscription,
     ),
 )
@@ -2,6 +2,7 @@ import strawberry
 from strawberry.types import Info
 
 from gql.permissions import IsAuthenticated
+from services.throttling import client_ip
 from services.users import delete_user, update, login, refresh_token, change_password, register_user
 
 from gql.base.types import MessageType, RefreshTokenInput
@@ -14,12 +15,12 @@ class UserMutation:
         description='User register',
     )
     async def user_register(self, info: Info, data: UserRegisterInput) -> MessageType:
-        return await register_user(data, info.context['session'])
+        return await register_user(data, info.context['session'], client_ip(info.context['request']))
 
     @strawberry.mutation(description='Login')
     async def login(self, info: Info,
                     data: LoginInput) -> LoginSuccessType:
-        return await login(data, info.context['session'])
+        return await login(data, info.context['session'], client_ip(info.context['request']))
 
     @strawberry.mutation(
         description='User updating',
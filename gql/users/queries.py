@@ -1,9 +1,10 @@
-from typing import List
+from typing import Optional
 
 import strawberry
 from strawberry.types import Info
 
-from .types import UserType
+from .types import UserType, UserFilterInput
+from gql.base.types import Connection
 from gql.permissions import IsAuthenticated
 from services.users import get_users
 
@@ -15,8 +16,9 @@ class UserQuery:
         description='Getting list of users',
         permission_classes=[IsAuthenticated],
     )
-    async def users_list(self, info: Info) -> List[UserType]:
-        return await get_users(info.context['session'])
+    async def users_list(self, info: Info, first: Optional[int] = None, after: Optional[str] = None,
+                         filters: Optional[UserFilterInput] = None) -> Connection[UserType]:
+        return await get_users(info.context['session'], first, after, filters)
 
     @strawberry.field(
         description='Getting authenticated user',
@@ -1,6 +1,9 @@
-from typing import TypeVar
+from typing import List, TypeVar
 
 import strawberry
+from strawberry.types import Info
+
+from gql.instagram.types import InstagramEntryType
 
 
 T = TypeVar('T')
@@ -33,6 +36,18 @@ class UserType:
     def full_name(self) -> str:
         return f'{self.first_name} {self.last_name}'.replace('None', '').strip()
 
+    @strawberry.field(description='Stored scrapes requested by the user, newest first. Later scrapes which '
+                                  'found the same photos are counted in lastSeenAt of the entry')
+    async def instagram_entries(self, info: Info) -> List[InstagramEntryType]:
+        return await info.context['dataloaders']['instagram_entries'].load(self.id)
+
+
+@strawberry.input
+class UserFilterInput:
+    # Users whose email starts with this text
+    email: str | None = None
+    is_active: bool | None = None
+
 
 @strawberry.input
 class LoginInput:
@@ -10,14 +10,23 @@ from starlette.middleware.sessions import SessionMiddleware
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-from services.users import login
+from services.users import login, get_principal_cache
+from services.throttling import client_ip, get_auth_throttle
+from utils.auth import get_password_executor, get_token_cache
 from admin import init_admin_page
 from settings import get_settings
 from admin.base import CustomAdmin
-from gql.schema import Mutation, Query
+from gql.schema import Mutation, Query, Subscription
 from gql.users.types import LoginInput
 from gql.auth_backend import AuthBackend
+from gql.exceptions import TooManyRequestsError
+from gql.extensions import PhaseTimingsExtension
+from gql.dataloaders import get_dataloaders
 from db.session import engine, get_async_session
+from services.jobs import get_scrape_job_queue
+from services.instagram import get_photos_cache, get_scrape_flights, get_missing_accounts
+from services.scrapers import get_backend, close_backends, backends_stats, get_scrape_guard
+from utils.metrics import get_histograms
 
 
 # App's config
@@ -28,11 +37,14 @@ async def get_context(
 ):
     return {
         'session': session,
+        'dataloaders': get_dataloaders(session),
     }
 
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
+    subscription=Subscription,
+    extensions=[PhaseTimingsExtension] if get_settings().graphql_timings else [],
 )
 
 graphql_app = GraphQLRouter(schema, context_getter=get_context)
@@ -53,6 +65,17 @@ def create_app() -> FastAPI:
                        allow_origins=["*"], allow_methods=["*"])
 
     app.add_middleware(SessionMiddleware, secret_key=get_settings().jwt_secret)
+
+    @app.on_event('startup')
+    async def start_scraper():
+        await get_backend().start()
+        await get_scrape_job_queue().start()
+
+    @app.on_event('shutdown')
+    async def close_scraper():
+        await get_scrape_job_queue().close()
+        await close_backends()
+
     return app
 
 
@@ -85,8 +108,28 @@ async def info():
     }
 
 
+@app.get('/metrics')
+async def metrics():
+    """ Getting scraper load metrics """
+
+    return {
+        'scraper_backends': backends_stats(),
+        'photos_cache': get_photos_cache().stats(),
+        'missing_accounts': get_missing_accounts().stats(),
+        'scrape_flights': get_scrape_flights().stats(),
+        'scrape_guard': get_scrape_guard().stats(),
+        'timings': get_histograms().stats(),
+        'scrape_jobs': get_scrape_job_queue().stats(),
+        'principal_cache': get_principal_cache().stats(),
+        'token_cache': get_token_cache().stats(),
+        'password_hashing': get_password_executor().stats(),
+        'auth_throttle': get_auth_throttle().stats(),
+    }
+
+
 @app.post('/token')
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_async_session),
 ):
@@ -94,7 +137,13 @@ async def login_for_access_token(
 
     cred = LoginInput(email=form_data.username, password=form_data.password)
     try:
-        data = await login(cred, session)
+        data = await login(cred, session, client_ip(request))
+    except TooManyRequestsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.extensions['explain']['non_field'],
+            headers={'Retry-After': str(e.retry_after)},
+        ) from e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
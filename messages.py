@@ -9,6 +9,8 @@ class ErrorMessage:
     CURRENT_PASSWORD = {'current_password': 'Incorrect password'}
     AUTH_NEEDED = {'non_field': 'You need to be logged'}
     PERMISSION_DENIED = {'non_field': 'Permission denied'}
+    PASSWORD_BUSY = {'non_field': 'Too many logins at the moment, try again later'}
+    TOO_MANY_ATTEMPTS = {'non_field': 'Too many attempts, try again in {} seconds'}
 
     PASSWORD_NOT_MATCH = 'Passwords do not match'
     PASSWORD_ERROR = 'Invalid password format. Your password must be at least 8 characters long and include' \
@@ -18,6 +20,15 @@ class ErrorMessage:
     ACCOUNT_NOT_FOUND = 'The Instagram account {} does not exist.'
     EXTRACTING_PHOTOS = 'Error occurred while extracting photos for user {}'
     PRIVATE_ACCOUNT = 'The Instagram account {} is private.'
+    NO_POSTS = 'The Instagram account {} has no posts.'
+    BATCH_TOO_LARGE = 'No more than {} accounts in one request.'
+    INVALID_CURSOR = 'Cursor is not valid.'
+    INVALID_PAGE_SIZE = 'first must be between 1 and {}.'
+    INVALID_PHOTO_QUERY = 'Enter a photo URL or the shortcode of a post.'
+    SCRAPER_BUSY = 'Too many photo requests are in progress, try again later.'
+    SCRAPER_RATE_LIMITED = 'Too many photo requests, try again later.'
+    ACCOUNT_RATE_LIMITED = 'Too many photo requests for {}, try again later.'
+    SCRAPER_UNAVAILABLE = 'Instagram is not available right now, try again later.'
 
 
 class SuccessMessage:
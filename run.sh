@@ -3,5 +3,6 @@
 # Migrate
 alembic upgrade head
 
-# Run server
-uvicorn main:app --host 0.0.0.0 --port 8000 --reload --proxy-headers --forwarded-allow-ips="*"
\ No newline at end of file
+# Run server. X-Forwarded-For is trusted only from FORWARDED_ALLOW_IPS (127.0.0.1 by default),
+# set it to the address of the reverse proxy, never to "*": clients would choose their own IP
+uvicorn main:app --host 0.0.0.0 --port 8000 --reload --proxy-headers
\ No newline at end of file
@@ -0,0 +1,262 @@
+# Standard library
+import time
+import shutil
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Selenium
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+# Custom modules
+from utils.metrics import phase
+
+CHROME_DRIVER_PATH = shutil.which("chromedriver")
+
+
+class DriverPoolTimeout(Exception):
+    """
+    Raised when no driver session became available within the checkout timeout.
+    """
+
+
+class PooledDriver:
+    """
+    Chrome session owned by the pool together with its usage counters.
+    """
+
+    def __init__(self, service: ChromeService, driver: webdriver.Chrome):
+        self.service = service
+        self.driver = driver
+        self.pages = 0
+        self.last_used_at = time.monotonic()
+
+    def is_alive(self) -> bool:
+        """
+        Health check: the chromedriver process answers and the browser session is still usable.
+        """
+        try:
+            # Any command makes a round trip to the browser, current_url is the cheapest one
+            self.driver.current_url
+            return self.service.is_connectable()
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"ERROR: PooledDriver.quit: {str(e)}")
+        finally:
+            # This ensures chromedriver is stopped, even if the browser has already crashed
+            self.service.stop()
+
+
+class ChromeDriverPool:
+    """
+    Bounded pool of pre-warmed Chrome sessions.
+
+    Sessions are checked out for one scrape and returned afterwards. A session is replaced when it
+    fails a health check, stays idle longer than `idle_timeout` seconds or has served `max_pages` pages,
+    the replacement is started by a background thread so no scrape waits for it.
+    The pool is thread-safe, checkout blocks while all `size` sessions are busy.
+    """
+
+    def __init__(self, driver_path: str | None, options_factory: Callable[[], webdriver.ChromeOptions], size: int,
+                 idle_timeout: float, max_pages: int, checkout_timeout: float,
+                 setup: Callable[[webdriver.Chrome], None] | None = None):
+        self.driver_path = driver_path
+        self.options_factory = options_factory
+        # Called with every new driver before it is used
+        self.setup = setup
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: deque[PooledDriver] = deque()
+        self._live = 0
+        self._closed = False
+        # A background thread is starting replacements of discarded sessions
+        self._refilling = False
+        self._condition = threading.Condition()
+
+        # Counters for monitoring
+        self._created_total = 0
+        self._recycled_total = 0
+        self._checkouts_total = 0
+        self._waits_total = 0
+
+    def _create(self) -> PooledDriver:
+        if not self.driver_path:
+            raise ValueError("chromedriver is not found in system's PATH.")
+        service = ChromeService(executable_path=self.driver_path)
+        try:
+            driver = webdriver.Chrome(service=service, options=self.options_factory())
+        except Exception:
+            service.stop()
+            raise
+        pooled = PooledDriver(service, driver)
+        if self.setup is not None:
+            try:
+                self.setup(driver)
+            except Exception:
+                pooled.quit()
+                raise
+        with self._condition:
+            self._created_total += 1
+        return pooled
+
+    def _discard(self, pooled: PooledDriver) -> None:
+        """ Quit the session and free its slot, a replacement is started in the background """
+        pooled.quit()
+        with self._condition:
+            self._live -= 1
+            self._recycled_total += 1
+            self._condition.notify()
+        self._refill()
+
+    def _refill(self) -> None:
+        """ Warm the pool up to its size in a background thread, unless one is running already """
+        with self._condition:
+            if self._closed or self._refilling or self._live >= self.size:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill_worker, name='driver-pool-refill', daemon=True).start()
+
+    def _refill_worker(self) -> None:
+        try:
+            self.warm()
+        finally:
+            with self._condition:
+                self._refilling = False
+
+    def _is_expired(self, pooled: PooledDriver) -> bool:
+        return time.monotonic() - pooled.last_used_at > self.idle_timeout
+
+    def warm(self) -> None:
+        """
+        Start sessions until the pool is full. Blocking, call it from a worker thread.
+        """
+        while True:
+            with self._condition:
+                if self._closed or self._live >= self.size:
+                    return
+                self._live += 1
+            try:
+                pooled = self._create()
+            except Exception as e:
+                print(f"ERROR: ChromeDriverPool.warm: {str(e)}")
+                with self._condition:
+                    self._live -= 1
+                    self._condition.notify()
+                return
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def checkout(self) -> PooledDriver:
+        """
+        Take a healthy session from the pool, starting a new one if there is a free slot.
+        """
+        self.reap_idle()
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            pooled = None
+            create = False
+            with self._condition:
+                if self._closed:
+                    raise DriverPoolTimeout("Driver pool is closed.")
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._live < self.size:
+                    self._live += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolTimeout(f"No driver session available after {self.checkout_timeout}s.")
+                    self._waits_total += 1
+                    with phase('driver_wait'):
+                        self._condition.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    with phase('driver_start'):
+                        pooled = self._create()
+                except Exception:
+                    with self._condition:
+                        self._live -= 1
+                        self._condition.notify()
+                    raise
+            elif self._is_expired(pooled) or not pooled.is_alive():
+                self._discard(pooled)
+                continue
+
+            with self._condition:
+                self._checkouts_total += 1
+            return pooled
+
+    def checkin(self, pooled: PooledDriver, broken: bool = False) -> None:
+        """
+        Return a session to the pool, recycling it if it is broken or has served enough pages.
+        """
+        pooled.pages += 1
+        if broken or self._closed or pooled.pages >= self.max_pages:
+            self._discard(pooled)
+            return
+        pooled.last_used_at = time.monotonic()
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self) -> Iterator[webdriver.Chrome]:
+        """
+        Check out a driver for the duration of the `with` block.
+        """
+        pooled = self.checkout()
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            # Page errors are expected while scraping, only drop the session if the browser itself failed
+            broken = not pooled.is_alive()
+            raise
+        finally:
+            self.checkin(pooled, broken=broken)
+
+    def reap_idle(self) -> None:
+        """ Close sessions which stayed idle longer than the idle timeout """
+        with self._condition:
+            expired = [pooled for pooled in self._idle if self._is_expired(pooled)]
+            for pooled in expired:
+                self._idle.remove(pooled)
+        for pooled in expired:
+            self._discard(pooled)
+
+    def close(self) -> None:
+        """ Quit all idle sessions, sessions in use are closed on checkin """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'size': self.size,
+                'live': self._live,
+                'idle': len(self._idle),
+                'in_use': self._live - len(self._idle),
+                'created_total': self._created_total,
+                'recycled_total': self._recycled_total,
+                'checkouts_total': self._checkouts_total,
+                'waits_total': self._waits_total,
+            }
@@ -1,35 +1,42 @@
 # Standard library
-import random
-import shutil
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, NamedTuple
+from datetime import datetime, timedelta, timezone
 
 # External libraries
+from sqlalchemy import select, insert, update, func, or_, tuple_, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-# Selenium
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service as ChromeService
-
 # Custom modules
 from db.models import UserModel
-from db.models._instagram import InstagramModel
-from gql.base.types import MessageType
-from gql.instagram.types import InstagramInput, InstagramType
+from db.models._instagram import InstagramModel, InstagramPostModel, InstagramSnapshotPostModel
 from messages import ErrorMessage
+from gql.base.types import MessageType, Connection
+from gql.exceptions import ValidationError
+from gql.instagram.types import (InstagramInput, InstagramType, InstagramBatchInput, InstagramBatchItemType, PhotoType,
+                                 PhotoStreamSummaryType, PhotoSearchInput, InstagramEntryType)
+from settings import get_settings
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+from utils.metrics import Timings, get_histograms, phase, track
+from utils.pagination import fetch_page
+from services.validators import validate_page_size
+from services.scrapers import (InstagramScraperError, InstagramAccountNotFoundError, ScraperUnavailableError, get_backend,
+                               get_scrape_guard, extract_shortcode, post_urls)
+
+logger = logging.getLogger(__name__)
 
-CHROME_DRIVER_PATH = shutil.which("chromedriver")
-if not CHROME_DRIVER_PATH:
-    raise ValueError("chromedriver is not found in system's PATH.")
+# Rows per INSERT statement, keeps bulk inserts under the bind parameter limit of PostgreSQL
+INSERT_CHUNK_SIZE = 1000
 
-# Define a list of User-Agent strings
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36",
-    "Mozilla/5.0 (iPhone14,3; U; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/602.1.50 (KHTML, like Gecko) Version/10.0 Mobile/19A346 Safari/602.1"
-]
+SHORTCODE_RE = re.compile(r'[A-Za-z0-9_-]+')
 
 
 class InstagramDatabaseService:
@@ -39,113 +46,506 @@ class InstagramDatabaseService:
 
     @staticmethod
     async def create_instagram_entry(session: AsyncSession, user: UserModel, photo_links: list,
-                                     instagram_username: str) -> InstagramModel:
+                                     instagram_username: str) -> int:
         """
         Creates a new InstagramModel entry with the given photo URLs and associates it with the provided user.
+        If the user's latest entry of the account has the same photos, it is marked as seen instead.
 
         :param session: An instance of AsyncSession for executing asynchronous database operations.
         :param user: The user model instance representing the user associated with the Instagram data.
         :param photo_links: A list of URLs representing the photos extracted from Instagram.
         :param instagram_username: Username for instagram account.
 
-        :return: A newly created instance of the InstagramModel representing the stored data.
+        :return: Id of the new or the latest entry.
         """
-        new_entry = InstagramModel(user_id=user.id, photo_urls=photo_links, account_username=instagram_username)
+        entry_ids = await InstagramDatabaseService.create_instagram_entries(
+            session, user, {instagram_username: photo_links},
+        )
+        return entry_ids[instagram_username]
 
-        # Add the new entry to the session
-        session.add(new_entry)
+    @staticmethod
+    async def create_instagram_entries(session: AsyncSession, user: UserModel, photo_links: dict) -> dict:
+        """
+        Creates InstagramModel entries for several accounts with one commit. Posts are stored once
+        in `instagram_post` and the entries reference them. An account whose latest entry of the user has
+        the same photos gets no new entry, that entry is marked as seen. Entries of other users are never reused.
 
-        # Commit the session to save the changes to the database
-        await session.commit()
-        return new_entry
+        :param session: An instance of AsyncSession for executing asynchronous database operations.
+        :param user: The user model instance representing the user associated with the Instagram data.
+        :param photo_links: Lists of photo URLs by instagram username.
 
+        :return: Ids of the new or the latest entries by instagram username.
+        """
+        if not photo_links:
+            return {}
+        hashes = {username: content_hash(links) for username, links in photo_links.items()}
+        with phase('db_commit'):
+            latest = await InstagramDatabaseService.get_latest_hashes(session, user.id, list(photo_links))
+            unchanged = {
+                username: entry_id for username, (entry_id, entry_hash) in latest.items()
+                if entry_hash == hashes[username]
+            }
+            if unchanged:
+                await session.execute(
+                    update(InstagramModel)
+                    .where(InstagramModel.id.in_(unchanged.values()))
+                    .values(last_seen_at=func.now())
+                )
+            changed = {username: links for username, links in photo_links.items() if username not in unchanged}
+            entry_ids = await InstagramDatabaseService._insert_entries(session, user, changed, hashes)
+            await session.commit()
+        return {**unchanged, **entry_ids}
 
-class InstagramScraperError(Exception):
-    """
-    Custom exception for errors during Instagram scraping.
-    This error is raised when there are issues related to the scraping process.
-    """
+    @staticmethod
+    async def _insert_entries(session: AsyncSession, user: UserModel, photo_links: dict, hashes: dict) -> dict:
+        """ Inserts entries with their posts, without commit """
+        if not photo_links:
+            return {}
+        # Links which are not posts can't be normalized, such snapshots keep the plain list of URLs
+        normalized = {
+            username: links for username, links in photo_links.items()
+            if all(extract_shortcode(link) for link in links)
+        }
+        rows = [
+            {
+                'user_id': user.id,
+                'account_username': username,
+                'photo_urls': None if username in normalized else links,
+                'content_hash': hashes[username],
+            }
+            for username, links in photo_links.items()
+        ]
+        post_ids = await InstagramDatabaseService.store_posts(session, normalized)
+        result = await session.execute(
+            insert(InstagramModel).values(rows).returning(InstagramModel.id, InstagramModel.account_username)
+        )
+        entry_ids = {username: entry_id for entry_id, username in result.all()}
+        snapshot_posts = [
+            {'instagram_id': entry_ids[username], 'position': position,
+             'post_id': post_ids[username, extract_shortcode(link)]}
+            for username, links in normalized.items()
+            for position, link in enumerate(links)
+        ]
+        for chunk in _chunks(snapshot_posts):
+            await session.execute(insert(InstagramSnapshotPostModel).values(chunk))
+        return entry_ids
+
+    @staticmethod
+    async def store_posts(session: AsyncSession, photo_links: dict) -> dict:
+        """
+        Stores the posts of several accounts, posts which are stored already are left as they are.
+
+        :param session: An instance of AsyncSession for executing asynchronous database operations.
+        :param photo_links: Lists of post URLs by instagram username.
 
-    def __init__(self, message: str):
-        self.message = message
-        super().__init__(self.message)
+        :return: Post ids by (instagram username, shortcode).
+        """
+        posts = {}
+        for username, links in photo_links.items():
+            for link in links:
+                posts.setdefault((username, extract_shortcode(link)), link)
+
+        post_ids = {}
+        rows = [{'account_username': username, 'shortcode': shortcode, 'url': url}
+                for (username, shortcode), url in posts.items()]
+        for chunk in _chunks(rows):
+            result = await session.execute(
+                pg_insert(InstagramPostModel)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=['account_username', 'shortcode'])
+                .returning(InstagramPostModel.id, InstagramPostModel.account_username, InstagramPostModel.shortcode)
+            )
+            post_ids.update({(username, shortcode): post_id for post_id, username, shortcode in result.all()})
+
+        # Posts stored by earlier scrapes
+        known = [key for key in posts if key not in post_ids]
+        for chunk in _chunks(known):
+            result = await session.execute(
+                select(InstagramPostModel.id, InstagramPostModel.account_username, InstagramPostModel.shortcode)
+                .where(tuple_(InstagramPostModel.account_username, InstagramPostModel.shortcode).in_(chunk))
+            )
+            post_ids.update({(username, shortcode): post_id for post_id, username, shortcode in result.all()})
+        return post_ids
 
-    def __str__(self) -> str:
-        return f"InstagramScraperError: {self.message}"
+    @staticmethod
+    async def get_latest_entry(session: AsyncSession, instagram_username: str,
+                               seen_after: datetime | None = None) -> InstagramModel | None:
+        """
+        Returns the most recent InstagramModel entry for the account.
 
+        :param session: An instance of AsyncSession for executing asynchronous database operations.
+        :param instagram_username: Username for instagram account.
+        :param seen_after: Ignore entries last seen before this moment.
 
-class InstagramScraper:
-    """
-    Class responsible for scraping Instagram using Selenium.
-    """
+        :return: The latest entry or None.
+        """
+        query = select(InstagramModel).where(InstagramModel.account_username == instagram_username)
+        if seen_after is not None:
+            query = query.where(InstagramModel.last_seen_at >= seen_after)
+        query = query.order_by(InstagramModel.created_at.desc()).limit(1)
+        result = await session.execute(query)
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_latest_entries(session: AsyncSession, instagram_usernames: list,
+                                 seen_after: datetime | None = None) -> dict:
+        """
+        Returns the most recent InstagramModel entry of each account with one query.
+
+        :return: Entries by instagram username, accounts without entries are missing.
+        """
+        query = (
+            select(InstagramModel)
+            .where(InstagramModel.account_username.in_(instagram_usernames))
+            .order_by(InstagramModel.account_username, InstagramModel.created_at.desc())
+            .distinct(InstagramModel.account_username)
+        )
+        if seen_after is not None:
+            query = query.where(InstagramModel.last_seen_at >= seen_after)
+        result = await session.execute(query)
+        return {entry.account_username: entry for entry in result.scalars().all()}
 
-    def __init__(self):
-        self.options = self._get_chrome_options()
+    @staticmethod
+    async def get_latest_hashes(session: AsyncSession, user_id: int, instagram_usernames: list) -> dict:
+        """
+        Returns the id and content hash of the user's most recent entry of each account, without loading the photos.
+
+        :return: (id, content_hash) by instagram username, accounts without entries of the user are missing.
+        """
+        result = await session.execute(
+            select(InstagramModel.account_username, InstagramModel.id, InstagramModel.content_hash)
+            .where(InstagramModel.user_id == user_id, InstagramModel.account_username.in_(instagram_usernames))
+            .order_by(InstagramModel.account_username, InstagramModel.created_at.desc())
+            .distinct(InstagramModel.account_username)
+        )
+        return {username: (entry_id, entry_hash) for username, entry_id, entry_hash in result.all()}
 
     @staticmethod
-    def _get_chrome_options() -> webdriver.ChromeOptions:
+    async def get_user_entries(session: AsyncSession, user_ids: list) -> dict:
         """
-        Configure and return chrome options for selenium driver.
+        Returns the entries of several users with one query.
+
+        :return: Entries by user id, newest first.
+        """
+        result = await session.execute(
+            select(InstagramModel)
+            .where(InstagramModel.user_id.in_(user_ids))
+            .order_by(InstagramModel.created_at.desc(), InstagramModel.id.desc())
+        )
+        entries = {user_id: [] for user_id in user_ids}
+        for entry in result.scalars().all():
+            entries[entry.user_id].append(entry)
+        return entries
+
+    @staticmethod
+    async def find_entries_with_post(session: AsyncSession, shortcode: str, urls: list, limit: int) -> list:
         """
-        # Set up Chrome options
-        options = webdriver.ChromeOptions()
+        Returns entries which contain the post, newest first. Entries referencing posts are found through
+        the shortcode index of `instagram_post`, entries with a plain list of URLs through the GIN index
+        on `photo_urls`.
+
+        :param session: An instance of AsyncSession for executing asynchronous database operations.
+        :param shortcode: Shortcode of the post.
+        :param urls: URLs the post can be stored under in plain lists.
+        :param limit: Maximum number of entries.
+        """
+        with_post = (
+            select(InstagramSnapshotPostModel.instagram_id)
+            .join(InstagramPostModel, InstagramPostModel.id == InstagramSnapshotPostModel.post_id)
+            .where(InstagramPostModel.shortcode == shortcode)
+        )
+        with_url = select(InstagramModel.id).where(or_(*(InstagramModel.photo_urls.contains([url]) for url in urls)))
+        result = await session.execute(
+            select(InstagramModel)
+            .where(InstagramModel.id.in_(union(with_post, with_url)))
+            .order_by(InstagramModel.created_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+
+def content_hash(photo_links: list) -> str:
+    """ Hash of the photo URLs in order, stored with every entry to detect scrapes without changes """
+    return hashlib.sha256('\n'.join(photo_links).encode()).hexdigest()
+
+
+def _chunks(items: list, size: int = INSERT_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
-        # Run Chrome in headless mode (without opening a GUI window)
-        options.add_argument('--headless')
 
-        # for docker
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
+def merge_known_posts(photo_links: list, known_links: list, max_count: int | None) -> list:
+    """
+    Completes the result of an incremental scrape, which ends with a run of stored posts,
+    with the posts which followed the last of them in the previous snapshot.
+
+    :param photo_links: Links found by the scrape.
+    :param known_links: Links of the previous snapshot.
+    :param max_count: Maximum photo count.
+    """
+    if not photo_links or not known_links:
+        return photo_links[:max_count]
+    known_shortcodes = [extract_shortcode(link) for link in known_links]
+    last = extract_shortcode(photo_links[-1])
+    if last not in known_shortcodes:
+        return photo_links[:max_count]
+    seen = {extract_shortcode(link) for link in photo_links}
+    rest = [link for link in known_links[known_shortcodes.index(last) + 1:] if extract_shortcode(link) not in seen]
+    return (photo_links + rest)[:max_count]
+
+
+@contextmanager
+def timed_scrape(username: str) -> Iterator[Timings]:
+    """ Tracks the phases of one scrape, records its duration and logs it if it took longer than the threshold """
+    with track() as timings:
+        try:
+            yield timings
+        finally:
+            elapsed = timings.elapsed
+            get_histograms().observe('scrape', elapsed)
+            if elapsed >= get_settings().scraper_slow_threshold:
+                name, seconds = timings.dominant() or ('unknown', 0.0)
+                logger.warning("Slow scrape of %s: %.2fs, mostly %s (%.2fs), phases: %s",
+                               username, elapsed, name, seconds, timings.as_dict())
+
+
+def normalize_username(username: str) -> str:
+    """ Instagram usernames are case-insensitive, '@name' and 'Name' are the same account """
+    return username.strip().lstrip('@').lower()
+
+
+class CachedPhotos(NamedTuple):
+    entry_id: int
+    urls: list
+    # max_count of the scrape, None means all photos found on the page
+    max_count: int | None
+
+    def covers(self, max_count: int | None) -> bool:
+        """ Whether the cached photos are enough to answer a request for max_count photos """
+        if max_count is None:
+            return self.max_count is None
+        return len(self.urls) >= max_count or (self.max_count is None or self.max_count >= max_count)
+
+
+class PhotosCache:
+    """
+    Freshness-based cache of scrape results.
+
+    Looks up an in-process LRU first, then the most recent `instagram` row for the account.
+    Results older than `ttl` seconds are never served.
+    """
 
-        # Start Chrome maximized. This is useful for ensuring that the browser starts
-        # in a consistent state, especially when automating.
-        options.add_argument("start-maximized")
+    def __init__(self, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
 
-        # "enable-automation" is a flag that indicates the browser is being controlled by automated software.
-        # "enable-logging" flag controls logging. Disabling both provides a smoother automation experience.
-        options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    async def get(self, session: AsyncSession, username: str, max_count: int | None) -> CachedPhotos | None:
+        """
+        :param session: Database session for asynchronous database operations.
+        :param username: Normalized instagram username.
+        :param max_count: Maximum photo count of the request.
 
-        # Disabling the use of an automation extension, making our scraping activities less detectable.
-        options.add_experimental_option('useAutomationExtension', False)
+        :return: Fresh cached photos or None.
+        """
+        cached = self.memory.get(username)
+        if cached is not None and cached.covers(max_count):
+            self.memory_hits += 1
+            return cached
+
+        entry = await InstagramDatabaseService.get_latest_entry(session, username, self._fresh_after())
+        cached = self._from_entry(username, entry, max_count)
+        if cached is None:
+            self.misses += 1
+        return cached
+
+    async def get_many(self, session: AsyncSession, usernames: list, max_count: int | None) -> dict:
+        """
+        Same as get for several accounts, rows are looked up with one query.
 
-        # Disables a JavaScript feature called AutomationControlled, making scraping less detectable.
-        options.add_argument('--disable-blink-features=AutomationControlled')
+        :return: Fresh cached photos by username, accounts without fresh photos are missing.
+        """
+        found = {}
+        for username in usernames:
+            cached = self.memory.get(username)
+            if cached is not None and cached.covers(max_count):
+                self.memory_hits += 1
+                found[username] = cached
+
+        missing = [username for username in usernames if username not in found]
+        if missing:
+            entries = await InstagramDatabaseService.get_latest_entries(session, missing, self._fresh_after())
+            for username in missing:
+                cached = self._from_entry(username, entries.get(username), max_count)
+                if cached is None:
+                    self.misses += 1
+                else:
+                    found[username] = cached
+        return found
+
+    def _fresh_after(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+
+    def _from_entry(self, username: str, entry: InstagramModel | None, max_count: int | None) -> CachedPhotos | None:
+        """ Cached photos from a stored entry if it has enough photos, the entry is promoted to memory """
+        if entry is None or max_count is None or len(entry.urls) < max_count:
+            return None
+        self.db_hits += 1
+        urls = entry.urls
+        cached = CachedPhotos(entry.id, urls, len(urls))
+        age = (datetime.now(timezone.utc) - entry.last_seen_at).total_seconds()
+        self.memory.set(username, cached, ttl=self.ttl - age)
+        return cached
+
+    def put(self, username: str, entry_id: int, urls: list, max_count: int | None) -> None:
+        self.memory.set(username, CachedPhotos(entry_id, urls, max_count))
+
+    def stats(self) -> dict:
+        return {
+            'ttl': self.ttl,
+            'memory': self.memory.stats(),
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+        }
 
-        # Choose a random User-Agent from the list. User-Agent defines the browser's type, version,
-        # and other attributes. By randomizing it, we are trying to mimic the behavior of different browsers,
-        # making it harder for websites to identify our scraper based on a static User-Agent.
-        options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
 
-        return options
+class InstagramScraper:
+    """
+    Class responsible for scraping Instagram: results cache, deduplication of scrapes and storing of results.
+    The scraping itself is done by a backend from services.scrapers.
+    """
 
-    async def extract_photos(self, username: str, max_count: int) -> list | str:
+    async def extract_photos(self, username: str, max_count: int | None, backend: str | None = None,
+                             stop_at: frozenset = frozenset()) -> list:
         """
         Extract photo URLs for a given Instagram username up to max_count.
         :param username: username for instagram account
         :param max_count: maximum photo count
-        :return photos or error message
+        :param backend: name of the scraper backend, the one from settings by default
+        :param stop_at: shortcodes of stored posts, the scrape stops after a run of them
+        :return photos, raises InstagramScraperError on failure
         """
-        service = ChromeService(executable_path=CHROME_DRIVER_PATH)
+        scraper_backend = get_backend(backend)
+        with self.attempt(scraper_backend.name, username):
+            return await scraper_backend.extract_photos(username, max_count, stop_at)
+
+    @staticmethod
+    @contextmanager
+    def attempt(backend: str, username: str) -> Iterator[None]:
+        """
+        Wraps every scrape. Accounts known to be missing fail right away, before any rate limit or browser,
+        the rest go through the scrape guard.
+        """
+        missing_accounts = get_missing_accounts()
+        message = missing_accounts.get(username)
+        if message is not None:
+            raise InstagramAccountNotFoundError(message)
         try:
-            with webdriver.Chrome(service=service, options=self.options) as driver:
-                driver.get(f"https://www.instagram.com/{username}/")
-                # Check if the account does not exist
-                if "Sorry, this page isn't available." in driver.page_source:
-                    raise InstagramScraperError(ErrorMessage.ACCOUNT_NOT_FOUND.format(username))
-
-                photos = WebDriverWait(driver, 10).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article div div div div a"))
-                )
-                photo_links = [photo.get_attribute('href') for photo in photos[:max_count]]
-        except Exception as e:
-            # raise the exception and print for log
-            print(f"ERROR: extract_photos: {str(e)}")
-            raise InstagramScraperError(ErrorMessage.EXTRACTING_PHOTOS.format(username))
+            with get_scrape_guard().attempt(backend, username):
+                yield
+        except InstagramAccountNotFoundError as e:
+            missing_accounts.set(username, e.message)
+            raise
 
-        finally:
-            # This ensures resources are released, even if an error occurs
-            service.stop()
-        return photo_links
+    @staticmethod
+    def last_snapshot(previous: InstagramModel | None, max_count: int | None) -> CachedPhotos | None:
+        """ Photos of the latest stored scrape regardless of its age, served when the scraper is unavailable """
+        if previous is None:
+            return None
+        return CachedPhotos(previous.id, previous.urls[:max_count], max_count)
+
+    @staticmethod
+    def known_shortcodes(previous: InstagramModel | None, max_count: int | None) -> frozenset:
+        """
+        Shortcodes an incremental scrape stops at. Only a previous scrape with max_count photos can fill in
+        everything after the stored posts the scrape reaches, otherwise the account is scraped in full.
+        """
+        if not get_settings().scraper_incremental or previous is None or max_count is None:
+            return frozenset()
+        urls = previous.urls
+        if len(urls) < max_count:
+            return frozenset()
+        return frozenset(filter(None, map(extract_shortcode, urls)))
+
+    async def scrape(self, username: str, max_count: int | None, backend: str | None = None,
+                     stop_at: frozenset = frozenset()) -> tuple[list, bool]:
+        """
+        Extract photos, joining a scrape of the same account by the same backend which is already in flight
+        if it asked for at least max_count photos.
+
+        :param username: Normalized instagram username.
+        :param max_count: Maximum photo count.
+        :param backend: Name of the scraper backend.
+        :param stop_at: Shortcodes of stored posts for an incremental scrape.
+
+        :return: Photo URLs and whether they come from another caller's scrape.
+        """
+        incremental = bool(stop_at)
+
+        def can_share(running: tuple[int | None, bool]) -> bool:
+            running_max_count, running_incremental = running
+            # An incremental scrape ends at a stored post, which only an incremental caller can fill in
+            if running_incremental and not incremental:
+                return False
+            return running_max_count is None or (max_count is not None and running_max_count >= max_count)
+
+        # A caller which chose a backend only gets photos scraped by it
+        backend = backend or get_settings().scraper_backend
+        return await get_scrape_flights().do(
+            (backend, username),
+            lambda: self.extract_photos(username, max_count, backend, stop_at),
+            tag=(max_count, incremental),
+            can_share=can_share,
+        )
+
+    async def fetch_photos(self, session: AsyncSession, user: UserModel, username: str, max_count: int | None,
+                           force_refresh: bool = False, backend: str | None = None,
+                           store_shared: bool = False) -> CachedPhotos:
+        """
+        Returns photos from the cache or scrapes and stores them.
+
+        :param session: Database session for asynchronous database operations.
+        :param user: Requested user model instance.
+        :param username: Normalized instagram username.
+        :param max_count: Maximum photo count.
+        :param force_refresh: Skip the cache and scrape again.
+        :param backend: Name of the scraper backend.
+        :param store_shared: Store an entry even if the photos come from another caller's scrape.
+
+        :return: Photos with the id of the entry which holds them. The id is None for photos
+            shared from another caller's scrape, unless store_shared is set. When the scraper is
+            rate limited or paused the latest stored photos are returned, however old they are.
+            Photos after the run of stored posts which ended the scrape come from the latest stored scrape.
+        """
+        cache = get_photos_cache()
+        if not force_refresh:
+            with phase('cache_lookup'):
+                cached = await cache.get(session, username, max_count)
+            if cached is not None:
+                return cached._replace(urls=cached.urls[:max_count])
+
+        with timed_scrape(username):
+            previous = await InstagramDatabaseService.get_latest_entry(session, username)
+            try:
+                photo_links, shared = await self.scrape(
+                    username, max_count, backend, self.known_shortcodes(previous, max_count),
+                )
+            except ScraperUnavailableError:
+                snapshot = self.last_snapshot(previous, max_count)
+                if snapshot is None:
+                    raise
+                return snapshot
+            photo_links = merge_known_posts(photo_links, previous.urls if previous else [], max_count)
+            if shared and not store_shared:
+                # The caller which ran the scrape has stored it
+                return CachedPhotos(None, photo_links, max_count)
+
+            entry_id = await InstagramDatabaseService.create_instagram_entry(session, user, photo_links, username)
+        cache.put(username, entry_id, photo_links, max_count)
+        return CachedPhotos(entry_id, photo_links, max_count)
 
     async def get_photos(self, session: AsyncSession, user: UserModel, data: InstagramInput) -> \
             InstagramType | MessageType:
@@ -159,8 +559,205 @@ class InstagramScraper:
         :return: An InstagramType instance containing the extracted photo URLs or message.
         """
         try:
-            photo_links = await self.extract_photos(data.username, data.max_count)
-            await InstagramDatabaseService.create_instagram_entry(session, user, photo_links, data.username)
-            return InstagramType(urls=photo_links)
+            photos = await self.fetch_photos(
+                session, user, normalize_username(data.username), data.max_count,
+                force_refresh=data.force_refresh,
+                backend=data.backend.value if data.backend else None,
+            )
+            return InstagramType(urls=photos.urls)
         except InstagramScraperError as e:
             return MessageType(message=str(e))
+
+    async def stream_photos(self, session: AsyncSession, user: UserModel, data: InstagramInput) -> \
+            AsyncIterator[PhotoType | PhotoStreamSummaryType]:
+        """
+        Yields photo URLs as the scraper finds them and a summary at the end. Cached photos are yielded
+        at once, a new scrape is stored when it is complete.
+
+        :param session: Database session for asynchronous database operations.
+        :param user: Requested user model instance.
+        :param data: Instagram input containing the username and maximum photo count.
+        """
+        username = normalize_username(data.username)
+        max_count = data.max_count
+        started_at = time.monotonic()
+
+        def summary(count: int, cached: bool = False, error: str | None = None) -> PhotoStreamSummaryType:
+            return PhotoStreamSummaryType(username=username, count=count, cached=cached, error=error,
+                                          elapsed=round(time.monotonic() - started_at, 3))
+
+        cache = get_photos_cache()
+        if not data.force_refresh:
+            with phase('cache_lookup'):
+                cached = await cache.get(session, username, max_count)
+            if cached is not None:
+                for url in cached.urls[:max_count]:
+                    yield PhotoType(url=url)
+                yield summary(len(cached.urls[:max_count]), cached=True)
+                return
+
+        photo_links = []
+        backend = get_backend(data.backend.value if data.backend else None)
+        previous = await InstagramDatabaseService.get_latest_entry(session, username)
+        try:
+            with timed_scrape(username), self.attempt(backend.name, username):
+                async for url in backend.iter_photos(username, max_count, self.known_shortcodes(previous, max_count)):
+                    photo_links.append(url)
+                    yield PhotoType(url=url)
+        except ScraperUnavailableError as e:
+            snapshot = self.last_snapshot(previous, max_count)
+            if snapshot is None:
+                yield summary(0, error=str(e))
+                return
+            for url in snapshot.urls:
+                yield PhotoType(url=url)
+            yield summary(len(snapshot.urls), cached=True)
+            return
+        except InstagramScraperError as e:
+            yield summary(len(photo_links), error=str(e))
+            return
+
+        merged = merge_known_posts(photo_links, previous.urls if previous else [], max_count)
+        # Posts after the run of stored ones, which the scrape didn't visit
+        for url in merged[len(photo_links):]:
+            yield PhotoType(url=url)
+        entry_id = await InstagramDatabaseService.create_instagram_entry(session, user, merged, username)
+        cache.put(username, entry_id, merged, max_count)
+        yield summary(len(merged))
+
+    async def get_photos_batch(self, session: AsyncSession, user: UserModel, data: InstagramBatchInput) -> \
+            list[InstagramBatchItemType]:
+        """
+        Photos of several accounts. Scrapes run in parallel, at most `scraper_batch_concurrency` at a time,
+        and new results are stored with one bulk insert.
+
+        :param session: Database session for asynchronous database operations.
+        :param user: Requested user model instance.
+        :param data: Instagram batch input containing the usernames and maximum photo count.
+
+        :return: Result or error of every account, in the order they were completed.
+        """
+        settings = get_settings()
+        usernames = list(dict.fromkeys(normalize_username(username) for username in data.usernames))
+        if len(usernames) > settings.scraper_batch_max_size:
+            raise ValidationError({'usernames': ErrorMessage.BATCH_TOO_LARGE.format(settings.scraper_batch_max_size)})
+
+        max_count = data.max_count
+        backend = data.backend.value if data.backend else None
+        cache = get_photos_cache()
+        cached = {}
+        if not data.force_refresh:
+            with phase('cache_lookup'):
+                cached = await cache.get_many(session, usernames, max_count)
+        results = [InstagramBatchItemType(username=username, urls=photos.urls[:max_count])
+                   for username, photos in cached.items()]
+
+        to_scrape = [username for username in usernames if username not in cached]
+        # Latest stored scrapes of any age, for incremental scrapes and as fallback
+        previous = await InstagramDatabaseService.get_latest_entries(session, to_scrape) if to_scrape else {}
+        semaphore = asyncio.Semaphore(settings.scraper_batch_concurrency)
+
+        async def scrape(username: str) -> tuple[str, list | InstagramScraperError, bool]:
+            """ Photos or error of the account and whether the photos have to be stored """
+            entry = previous.get(username)
+            async with semaphore:
+                try:
+                    with timed_scrape(username):
+                        photo_links, shared = await self.scrape(
+                            username, max_count, backend, self.known_shortcodes(entry, max_count),
+                        )
+                except InstagramScraperError as e:
+                    return username, e, False
+            return username, merge_known_posts(photo_links, entry.urls if entry else [], max_count), not shared
+
+        to_store = {}
+        # Accounts the scraper refused, answered with their latest stored photos if there are any
+        unavailable = {}
+        for completed in asyncio.as_completed([scrape(username) for username in to_scrape]):
+            username, photos, store = await completed
+            if isinstance(photos, ScraperUnavailableError):
+                unavailable[username] = photos
+            elif isinstance(photos, InstagramScraperError):
+                results.append(InstagramBatchItemType(username=username, error=str(photos)))
+            else:
+                if store:
+                    to_store[username] = photos
+                results.append(InstagramBatchItemType(username=username, urls=photos))
+
+        for username, error in unavailable.items():
+            entry = previous.get(username)
+            if entry is None:
+                results.append(InstagramBatchItemType(username=username, error=str(error)))
+            else:
+                results.append(InstagramBatchItemType(username=username, urls=entry.urls[:max_count]))
+
+        entry_ids = await InstagramDatabaseService.create_instagram_entries(session, user, to_store)
+        for username, entry_id in entry_ids.items():
+            cache.put(username, entry_id, to_store[username], max_count)
+        return results
+
+
+class InstagramSearchService:
+    """
+    Search in stored scrapes.
+    """
+
+    @staticmethod
+    async def get_scrape_history(session: AsyncSession, username: str, first: int | None = None,
+                                 after: str | None = None) -> Connection[InstagramEntryType]:
+        """
+        Stored scrapes of an account, newest first.
+
+        :param session: Database session for asynchronous database operations.
+        :param username: Instagram username.
+        :param first: Scrapes in the page.
+        :param after: Cursor of the last scrape of the previous page.
+        """
+        query = select(InstagramModel).where(InstagramModel.account_username == normalize_username(username))
+        try:
+            entries, has_next_page = await fetch_page(
+                session, query, InstagramModel.created_at, InstagramModel.id, validate_page_size(first), after,
+                descending=True,
+            )
+        except ValueError:
+            raise ValidationError({'after': ErrorMessage.INVALID_CURSOR})
+        return Connection.from_page(entries, has_next_page)
+
+    @staticmethod
+    async def search_photos(session: AsyncSession, data: PhotoSearchInput) -> list[InstagramModel]:
+        """
+        Stored scrapes which contain the photo.
+
+        :param session: Database session for asynchronous database operations.
+        :param data: Photo URL or shortcode of the post and the maximum number of scrapes.
+
+        :return: Entries, newest first.
+        """
+        query = data.query.strip()
+        shortcode = extract_shortcode(query) if '/' in query else query
+        if not shortcode or not SHORTCODE_RE.fullmatch(shortcode):
+            raise ValidationError({'query': ErrorMessage.INVALID_PHOTO_QUERY})
+        urls = post_urls(shortcode)
+        if '/' in query and query not in urls:
+            urls.append(query)
+        limit = min(max(data.first or 1, 1), get_settings().photo_search_max_results)
+        return await InstagramDatabaseService.find_entries_with_post(session, shortcode, urls, limit)
+
+
+@lru_cache
+def get_photos_cache() -> PhotosCache:
+    settings = get_settings()
+    return PhotosCache(maxsize=settings.scraper_cache_size, ttl=settings.scraper_cache_ttl)
+
+
+@lru_cache
+def get_missing_accounts() -> TTLCache:
+    """ Accounts which don't exist, by normalized username, with the error message """
+    settings = get_settings()
+    return TTLCache(maxsize=settings.scraper_not_found_cache_size, ttl=settings.scraper_not_found_ttl)
+
+
+@lru_cache
+def get_scrape_flights() -> SingleFlight:
+    """ Scrapes in flight, keyed by normalized username """
+    return SingleFlight()
@@ -0,0 +1,212 @@
+# Standard library
+import asyncio
+import itertools
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+
+# External libraries
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Custom modules
+from messages import ErrorMessage
+from settings import get_settings
+from gql.exceptions import FoundError
+from db.session import async_session
+from services.users import get
+from db.models import UserModel, ScrapeJobModel, ScrapeJobStatus
+from services.instagram import InstagramScraper, InstagramScraperError, normalize_username
+from gql.instagram.types import ScrapeJobInput
+
+
+class ScrapeJobService:
+    """
+    Class responsible for database interactions related to scrape jobs.
+    """
+
+    @staticmethod
+    async def create_job(session: AsyncSession, user: UserModel, data: ScrapeJobInput) -> ScrapeJobModel:
+        job = ScrapeJobModel(
+            user_id=user.id,
+            account_username=normalize_username(data.username),
+            max_count=data.max_count,
+            force_refresh=bool(data.force_refresh),
+            backend=data.backend.value if data.backend else None,
+            priority=data.priority or 0,
+            status=ScrapeJobStatus.QUEUED,
+        )
+        session.add(job)
+        await session.commit()
+        # created_at is set by the database
+        await session.refresh(job)
+        return job
+
+    @staticmethod
+    async def get_job(session: AsyncSession, user: UserModel, job_id: int) -> ScrapeJobModel:
+        """ Job of the user by id, jobs of other users are not visible """
+        query = select(ScrapeJobModel).where(ScrapeJobModel.id == job_id, ScrapeJobModel.user_id == user.id)
+        result = await session.execute(query)
+        job = result.scalars().first()
+        if job is None:
+            raise FoundError({'id': ErrorMessage.NOT_FOUND})
+        return job
+
+    @staticmethod
+    async def claim_job(session: AsyncSession, job_id: int) -> bool:
+        """ Atomically moves a queued job to running, so a job is never processed twice """
+        result = await session.execute(
+            update(ScrapeJobModel)
+            .where(ScrapeJobModel.id == job_id, ScrapeJobModel.status == ScrapeJobStatus.QUEUED)
+            .values(status=ScrapeJobStatus.RUNNING, started_at=datetime.now(timezone.utc))
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    async def requeue_jobs(session: AsyncSession, job_ids: list[int] | None = None,
+                           started_before: datetime | None = None) -> list[tuple[int, int]]:
+        """
+        Atomically moves running jobs back to queued, only one process gets each job.
+
+        :param job_ids: Only these jobs.
+        :param started_before: Only jobs which started before.
+
+        :return: Ids and priorities of the requeued jobs.
+        """
+        query = update(ScrapeJobModel).where(ScrapeJobModel.status == ScrapeJobStatus.RUNNING)
+        if job_ids is not None:
+            query = query.where(ScrapeJobModel.id.in_(job_ids))
+        if started_before is not None:
+            query = query.where(ScrapeJobModel.started_at < started_before)
+        result = await session.execute(
+            query.values(status=ScrapeJobStatus.QUEUED, started_at=None)
+            .returning(ScrapeJobModel.id, ScrapeJobModel.priority)
+        )
+        await session.commit()
+        return result.all()
+
+
+class ScrapeJobQueue:
+    """
+    In-process priority queue of scrape jobs worked off by a fixed number of asyncio workers.
+    The job state lives in the `scrape_job` table. Jobs running at shutdown are queued again, jobs of a process
+    which died are taken over by any process once they are running for longer than `stale_timeout` seconds.
+    """
+
+    def __init__(self, workers: int, stale_timeout: int):
+        self.workers = workers
+        self.stale_timeout = stale_timeout
+        self._queue: asyncio.PriorityQueue | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Jobs claimed by this process
+        self._active: set[int] = set()
+        # Tie-breaker keeping jobs with equal priority in FIFO order
+        self._counter = itertools.count()
+        self._running = 0
+        self._done_total = 0
+        self._failed_total = 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        async with async_session() as session:
+            # Queued with the other queued jobs below
+            await self._requeue_stale(session)
+            result = await session.execute(
+                select(ScrapeJobModel.id, ScrapeJobModel.priority)
+                .where(ScrapeJobModel.status == ScrapeJobStatus.QUEUED)
+                .order_by(ScrapeJobModel.created_at)
+            )
+            for job_id, priority in result.all():
+                self.put(job_id, priority)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._watch_stale()))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._active:
+            # Interrupted jobs start over in the next process
+            async with async_session() as session:
+                await ScrapeJobService.requeue_jobs(session, job_ids=list(self._active))
+            self._active.clear()
+
+    async def _requeue_stale(self, session: AsyncSession) -> list[tuple[int, int]]:
+        """ Takes over the jobs of processes which died while running them """
+        started_before = datetime.now(timezone.utc) - timedelta(seconds=self.stale_timeout)
+        return await ScrapeJobService.requeue_jobs(session, started_before=started_before)
+
+    async def _watch_stale(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_timeout)
+            try:
+                async with async_session() as session:
+                    for job_id, priority in await self._requeue_stale(session):
+                        self.put(job_id, priority)
+            except Exception as e:
+                print(f"ERROR: ScrapeJobQueue: requeue of stale jobs: {str(e)}")
+
+    def put(self, job_id: int, priority: int) -> None:
+        self._queue.put_nowait((-priority, next(self._counter), job_id))
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._running += 1
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"ERROR: ScrapeJobQueue: job {job_id}: {str(e)}")
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _process(self, job_id: int) -> None:
+        async with async_session() as session:
+            if not await ScrapeJobService.claim_job(session, job_id):
+                return
+            self._active.add(job_id)
+            job = await session.get(ScrapeJobModel, job_id)
+            try:
+                user = await get(session, user_id=job.user_id)
+                photos = await InstagramScraper().fetch_photos(
+                    session, user, job.account_username, job.max_count,
+                    force_refresh=job.force_refresh,
+                    backend=job.backend,
+                    store_shared=True,
+                )
+            except Exception as e:
+                await session.rollback()
+                job.status = ScrapeJobStatus.FAILED
+                job.error = (e.message if isinstance(e, InstagramScraperError) else str(e))[:500]
+                self._failed_total += 1
+            else:
+                job.status = ScrapeJobStatus.DONE
+                job.instagram_id = photos.entry_id
+                self._done_total += 1
+            job.finished_at = datetime.now(timezone.utc)
+            await session.commit()
+            self._active.discard(job_id)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'running': self._running,
+            'done_total': self._done_total,
+            'failed_total': self._failed_total,
+        }
+
+
+async def start_photo_scrape(session: AsyncSession, user: UserModel, data: ScrapeJobInput) -> ScrapeJobModel:
+    """ Stores the job and queues it, returns without waiting for the scrape """
+    job = await ScrapeJobService.create_job(session, user, data)
+    get_scrape_job_queue().put(job.id, job.priority)
+    return job
+
+
+@lru_cache
+def get_scrape_job_queue() -> ScrapeJobQueue:
+    settings = get_settings()
+    return ScrapeJobQueue(workers=settings.scrape_job_workers, stale_timeout=settings.scrape_job_stale_timeout)
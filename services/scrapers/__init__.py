@@ -0,0 +1,62 @@
+from settings import get_settings
+from ._base import (ScraperBackend, InstagramScraperError, InstagramAccountError, InstagramAccountNotFoundError,
+                    ScraperUnavailableError, extract_shortcode, post_urls)
+from ._guard import ScrapeGuard, get_scrape_guard
+from ._http import HttpBackend
+from ._selenium import SeleniumBackend, get_driver_pool, get_scraper_executor
+from ._process import ProcessBackend
+
+
+BACKENDS: dict[str, type[ScraperBackend]] = {
+    SeleniumBackend.name: SeleniumBackend,
+    HttpBackend.name: HttpBackend,
+}
+
+_instances: dict[str, ScraperBackend] = {}
+
+
+def get_backend(name: str | None = None) -> ScraperBackend:
+    """
+    Backend by name, the one from settings by default. Instances are shared by the process.
+    Isolated backends run in worker processes if `scraper_worker_processes` is set.
+    """
+    settings = get_settings()
+    name = name or settings.scraper_backend
+    if name not in _instances:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown scraper backend: {name}")
+        if BACKENDS[name].isolated and settings.scraper_worker_processes > 0:
+            _instances[name] = ProcessBackend.from_settings(settings, backend=name)
+        else:
+            _instances[name] = BACKENDS[name].from_settings(settings)
+    return _instances[name]
+
+
+async def close_backends() -> None:
+    for backend in _instances.values():
+        await backend.close()
+
+
+def backends_stats() -> dict:
+    return {name: backend.stats() for name, backend in _instances.items()}
+
+
+__all__ = [
+    'ScraperBackend',
+    'InstagramScraperError',
+    'InstagramAccountError',
+    'InstagramAccountNotFoundError',
+    'ScraperUnavailableError',
+    'extract_shortcode',
+    'post_urls',
+    'HttpBackend',
+    'SeleniumBackend',
+    'ProcessBackend',
+    'get_backend',
+    'close_backends',
+    'backends_stats',
+    'get_driver_pool',
+    'get_scraper_executor',
+    'ScrapeGuard',
+    'get_scrape_guard',
+]
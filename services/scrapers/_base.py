@@ -0,0 +1,127 @@
+# Standard library
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+# Custom modules
+from settings import Settings
+
+INSTAGRAM_URL = "https://www.instagram.com"
+
+# Define a list of User-Agent strings
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36",
+    "Mozilla/5.0 (iPhone14,3; U; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/602.1.50 (KHTML, like Gecko) Version/10.0 Mobile/19A346 Safari/602.1"
+]
+
+# Text shown by Instagram instead of a profile which doesn't exist
+PAGE_NOT_AVAILABLE = "Sorry, this page isn't available."
+
+# Instagram shows up to 3 pinned posts first, however old they are, so an incremental scrape stops only
+# after a run of stored posts which can't be all pinned
+KNOWN_RUN_TO_STOP = 4
+
+# Post links look like /p/<shortcode>/, /reel/<shortcode>/ or /tv/<shortcode>/
+SHORTCODE_RE = re.compile(r'/(?:p|reel|tv)/([A-Za-z0-9_-]+)')
+
+
+def extract_shortcode(url: str | None) -> str | None:
+    """ Shortcode of the post from its URL, None for URLs which are not posts """
+    match = SHORTCODE_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def post_urls(shortcode: str) -> list:
+    """ URLs a post can be stored under, one for every kind of post """
+    return [f"{INSTAGRAM_URL}/{kind}/{shortcode}/" for kind in ('p', 'reel', 'tv')]
+
+
+class KnownPostsRun:
+    """ Decides when an incremental scrape has reached the stored posts """
+
+    def __init__(self, stop_at: frozenset, length: int = KNOWN_RUN_TO_STOP):
+        """
+        :param stop_at: Shortcodes of stored posts.
+        :param length: Consecutive stored posts after which the scrape stops.
+        """
+        self.stop_at = stop_at
+        self.length = length
+        self._run = 0
+
+    def reached(self, shortcode: str) -> bool:
+        """ Takes the next post of the profile in order, True if the scrape can end with it """
+        if not self.stop_at:
+            return False
+        self._run = self._run + 1 if shortcode in self.stop_at else 0
+        return self._run >= self.length
+
+
+class InstagramScraperError(Exception):
+    """
+    Custom exception for errors during Instagram scraping.
+    This error is raised when there are issues related to the scraping process.
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return f"InstagramScraperError: {self.message}"
+
+
+class InstagramAccountError(InstagramScraperError):
+    """ Instagram answered, but the account has no photos to give: it is private or doesn't exist """
+
+
+class InstagramAccountNotFoundError(InstagramAccountError):
+    """ The account doesn't exist """
+
+
+class ScraperUnavailableError(InstagramScraperError):
+    """ The scrape was refused without contacting Instagram: the scraper is busy, rate limited or paused """
+
+
+class ScraperBackend(ABC):
+    """
+    Engine which extracts photo URLs of an Instagram profile.
+    """
+
+    name: str
+    # Runs in scraper worker processes instead of the API process when they are enabled
+    isolated: bool = False
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls, settings: Settings) -> 'ScraperBackend':
+        """ Create the backend configured by the app settings """
+
+    @abstractmethod
+    async def extract_photos(self, username: str, max_count: int | None, stop_at: frozenset = frozenset()) -> list:
+        """
+        Extract photo URLs for a given Instagram username up to max_count.
+        :param username: username for instagram account
+        :param max_count: maximum photo count, None for all photos found on the page
+        :param stop_at: shortcodes of posts stored already, the scrape ends after KNOWN_RUN_TO_STOP of them in a row
+        :return photo URLs, raises InstagramScraperError on failure
+        """
+
+    async def iter_photos(self, username: str, max_count: int | None,
+                          stop_at: frozenset = frozenset()) -> AsyncIterator[str]:
+        """
+        Yields photo URLs as they are found. Backends which get all posts at once yield them after
+        extract_photos, those which discover posts gradually override it.
+        """
+        for link in await self.extract_photos(username, max_count, stop_at):
+            yield link
+
+    async def start(self) -> None:
+        """ Prepare resources on app startup """
+
+    async def close(self) -> None:
+        """ Release resources on app shutdown """
+
+    def stats(self) -> dict:
+        return {}
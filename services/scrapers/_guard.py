@@ -0,0 +1,94 @@
+# Standard library
+from typing import Iterator
+from functools import lru_cache
+from contextlib import contextmanager
+
+# Custom modules
+from messages import ErrorMessage
+from settings import get_settings
+from utils.circuitbreaker import CircuitBreaker
+from utils.ratelimit import KeyedTokenBuckets, TokenBucket
+from ._base import InstagramAccountError, ScraperUnavailableError
+
+
+class ScrapeGuard:
+    """
+    Admission control in front of the backends: a global and a per-account token bucket,
+    and a circuit breaker per backend which opens after consecutive failed scrapes.
+    """
+
+    def __init__(self, rate: float, burst: int, account_rate: float, account_burst: int, max_accounts: int,
+                 failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.limiter = TokenBucket(rate, burst)
+        self.account_limiters = KeyedTokenBuckets(account_rate, account_burst, maxsize=max_accounts)
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.limited_total = 0
+        self.account_limited_total = 0
+
+    def breaker(self, backend: str) -> CircuitBreaker:
+        if backend not in self.breakers:
+            self.breakers[backend] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[backend]
+
+    @contextmanager
+    def attempt(self, backend: str, username: str) -> Iterator[None]:
+        """
+        Admits a scrape or raises ScraperUnavailableError, then records its outcome in the breaker.
+        Missing, private and empty accounts are answers from Instagram, so they count as successes,
+        only errors of the browser, the network or pages which didn't load are failures.
+        """
+        breaker = self.breaker(backend)
+        if not breaker.allow():
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_UNAVAILABLE)
+        if not self.account_limiters.try_acquire(username):
+            self.account_limited_total += 1
+            breaker.record_ignored()
+            raise ScraperUnavailableError(ErrorMessage.ACCOUNT_RATE_LIMITED.format(username))
+        if not self.limiter.try_acquire():
+            self.account_limiters.get(username).refund()
+            self.limited_total += 1
+            breaker.record_ignored()
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_RATE_LIMITED)
+
+        try:
+            yield
+        except InstagramAccountError:
+            breaker.record_success()
+            raise
+        except ScraperUnavailableError:
+            breaker.record_ignored()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled request or closed stream, the scrape didn't finish
+            breaker.record_ignored()
+            raise
+        else:
+            breaker.record_success()
+
+    def stats(self) -> dict:
+        return {
+            'tokens': round(self.limiter.tokens, 2),
+            'limited_total': self.limited_total,
+            'accounts_tracked': len(self.account_limiters),
+            'account_limited_total': self.account_limited_total,
+            'breakers': {backend: breaker.stats() for backend, breaker in self.breakers.items()},
+        }
+
+
+@lru_cache
+def get_scrape_guard() -> ScrapeGuard:
+    settings = get_settings()
+    return ScrapeGuard(
+        rate=settings.scraper_rate_limit,
+        burst=settings.scraper_rate_burst,
+        account_rate=settings.scraper_account_rate_limit,
+        account_burst=settings.scraper_account_rate_burst,
+        max_accounts=settings.scrape_guard_max_accounts,
+        failure_threshold=settings.scraper_breaker_failures,
+        reset_timeout=settings.scraper_breaker_reset_timeout,
+    )
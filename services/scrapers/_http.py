@@ -0,0 +1,148 @@
+# Standard library
+import re
+import json
+import random
+from typing import Any, Iterator
+
+# External libraries
+import httpx
+
+# Custom modules
+from messages import ErrorMessage
+from settings import Settings
+from utils.metrics import phase
+from ._base import (INSTAGRAM_URL, PAGE_NOT_AVAILABLE, USER_AGENTS, InstagramAccountError, InstagramAccountNotFoundError,
+                    InstagramScraperError, KnownPostsRun, ScraperBackend)
+
+# Profile data is embedded in the page either as `window._sharedData = {...};`
+# or as JSON script tags, depending on the page version served
+SHARED_DATA_RE = re.compile(r'window\._sharedData\s*=\s*(\{.*?\});\s*</script>', re.S)
+JSON_SCRIPT_RE = re.compile(r'<script type="application/json"[^>]*>(.*?)</script>', re.S)
+
+
+def _iter_json_payloads(html: str) -> Iterator[Any]:
+    """ Yields every JSON document embedded in the page which can be parsed """
+    for regex in (SHARED_DATA_RE, JSON_SCRIPT_RE):
+        for match in regex.finditer(html):
+            try:
+                yield json.loads(match.group(1))
+            except ValueError:
+                continue
+
+
+def _walk(node: Any) -> Iterator[dict]:
+    """ Yields all dictionaries of a JSON document, depth first in document order """
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def parse_profile(html: str, username: str) -> tuple[list, bool]:
+    """
+    Extract post shortcodes from the data embedded in a profile page.
+
+    :param html: Profile page source.
+    :param username: Username for instagram account.
+
+    :return: Shortcodes in page order and whether the account is private.
+    """
+    shortcodes = []
+    is_private = False
+    for payload in _iter_json_payloads(html):
+        for node in _walk(payload):
+            if node.get('username') == username and node.get('is_private') is True:
+                is_private = True
+            # Timeline media is a connection: {"edges": [{"node": {"shortcode": ...}}]}
+            edges = node.get('edges')
+            if not isinstance(edges, list):
+                continue
+            for edge in edges:
+                post = edge.get('node') if isinstance(edge, dict) else None
+                if not isinstance(post, dict):
+                    continue
+                shortcode = post.get('shortcode') or post.get('code')
+                if isinstance(shortcode, str) and shortcode not in shortcodes:
+                    shortcodes.append(shortcode)
+    return shortcodes, is_private
+
+
+class HttpBackend(ScraperBackend):
+    """
+    Fetches the profile page with httpx and parses the embedded post data, no browser involved.
+    """
+
+    name = 'http'
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._requests_total = 0
+        self._failures_total = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'HttpBackend':
+        return cls(base_url=settings.instagram_base_url, timeout=settings.scraper_http_timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use, so it belongs to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={
+                    'User-Agent': random.choice(USER_AGENTS),
+                    'Accept-Language': 'en-US,en;q=0.9',
+                },
+            )
+        return self._client
+
+    async def extract_photos(self, username: str, max_count: int | None, stop_at: frozenset = frozenset()) -> list:
+        self._requests_total += 1
+        try:
+            with phase('http_fetch'):
+                response = await self.client.get(f"/{username}/")
+        except httpx.HTTPError as e:
+            self._failures_total += 1
+            print(f"ERROR: extract_photos: {str(e)}")
+            raise InstagramScraperError(ErrorMessage.EXTRACTING_PHOTOS.format(username))
+
+        if response.status_code == 404 or PAGE_NOT_AVAILABLE in response.text:
+            raise InstagramAccountNotFoundError(ErrorMessage.ACCOUNT_NOT_FOUND.format(username))
+        if response.status_code != 200:
+            self._failures_total += 1
+            print(f"ERROR: extract_photos: {username} responded with {response.status_code}")
+            raise InstagramScraperError(ErrorMessage.EXTRACTING_PHOTOS.format(username))
+
+        with phase('parse'):
+            shortcodes, is_private = parse_profile(response.text, username)
+        if not shortcodes:
+            if is_private:
+                raise InstagramAccountError(ErrorMessage.PRIVATE_ACCOUNT.format(username))
+            # Login wall or a page layout the parser doesn't know
+            self._failures_total += 1
+            raise InstagramScraperError(ErrorMessage.EXTRACTING_PHOTOS.format(username))
+        shortcodes = shortcodes[:max_count]
+        known_run = KnownPostsRun(stop_at)
+        for position, shortcode in enumerate(shortcodes):
+            if known_run.reached(shortcode):
+                shortcodes = shortcodes[:position + 1]
+                break
+        return [f"{INSTAGRAM_URL}/p/{shortcode}/" for shortcode in shortcodes]
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            'requests_total': self._requests_total,
+            'failures_total': self._failures_total,
+        }
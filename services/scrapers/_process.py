@@ -0,0 +1,409 @@
+# Standard library
+import os
+import signal
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing
+from typing import AsyncIterator
+from multiprocessing.connection import Connection
+
+# Custom modules
+from messages import ErrorMessage
+from settings import Settings, get_settings
+from utils.metrics import record, track
+from ._base import (InstagramAccountError, InstagramAccountNotFoundError, InstagramScraperError, ScraperBackend,
+                    ScraperUnavailableError)
+
+logger = logging.getLogger(__name__)
+
+# Scraper errors which cross the process boundary, by class name
+ERRORS = {
+    error.__name__: error
+    for error in (InstagramScraperError, InstagramAccountError, InstagramAccountNotFoundError, ScraperUnavailableError)
+}
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def tree_rss(pid: int) -> int:
+    """
+    Resident memory in bytes of the process and all its descendants, chromedriver and Chrome included.
+    Returns 0 where /proc is not available.
+    """
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces, the parent pid is the second field after it
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            pass
+        stack.extend(children.get(current, ()))
+    return total
+
+
+# Worker process side
+
+
+def worker_main(conn: Connection, backend: str, max_jobs: int, max_rss: int) -> None:
+    """ Entry point of a worker process """
+    # Ctrl+C reaches the whole process group, the API process stops its workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_Worker(conn, backend, max_jobs, max_rss).run())
+
+
+class _Worker:
+    """
+    Runs scrape requests from the API process on its own instance of the backend.
+
+    Messages from the API process:
+        ('scrape', job_id, username, max_count, stop_at, stream), ('cancel', job_id), ('stop',)
+    Messages to the API process:
+        ('link', job_id, url) while streaming, ('result', job_id, links, error, phases) once per job,
+        ('status', stats) after every job, ('retiring', reason) when a limit is reached.
+    """
+
+    def __init__(self, conn: Connection, backend: str, max_jobs: int, max_rss: int):
+        self.conn = conn
+        self.backend_name = backend
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.backend: ScraperBackend | None = None
+        self.jobs_done = 0
+        self.retiring = False
+
+    async def run(self) -> None:
+        from services.scrapers import BACKENDS
+
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue = asyncio.Queue()
+
+        def read() -> None:
+            while True:
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    # The API process is gone
+                    message = ('stop', True)
+                loop.call_soon_threadsafe(messages.put_nowait, message)
+                if message[0] == 'stop':
+                    return
+
+        self.backend = BACKENDS[self.backend_name].from_settings(get_settings())
+        await self.backend.start()
+        threading.Thread(target=read, name='scraper-worker-reader', daemon=True).start()
+
+        tasks: dict[int, asyncio.Task] = {}
+        orphaned = False
+        while True:
+            message = await messages.get()
+            if message[0] == 'scrape':
+                _, job_id, username, max_count, stop_at, stream = message
+                task = tasks[job_id] = asyncio.create_task(self.scrape(job_id, username, max_count, stop_at, stream))
+                task.add_done_callback(lambda _, job_id=job_id: tasks.pop(job_id, None))
+            elif message[0] == 'cancel':
+                task = tasks.get(message[1])
+                if task is not None:
+                    task.cancel()
+            elif message[0] == 'stop':
+                orphaned = len(message) > 1
+                break
+
+        if orphaned:
+            for task in list(tasks.values()):
+                task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await self.backend.close()
+
+    def send(self, message: tuple) -> None:
+        try:
+            self.conn.send(message)
+        except (EOFError, OSError):
+            pass
+
+    async def scrape(self, job_id: int, username: str, max_count: int | None, stop_at: frozenset,
+                     stream: bool) -> None:
+        links = []
+        error = None
+        with track() as timings:
+            try:
+                if stream:
+                    async for link in self.backend.iter_photos(username, max_count, stop_at):
+                        links.append(link)
+                        self.send(('link', job_id, link))
+                else:
+                    links = await self.backend.extract_photos(username, max_count, stop_at)
+            except asyncio.CancelledError:
+                # Cancelled by the API process, nobody waits for the result
+                return
+            except InstagramScraperError as e:
+                error = (type(e).__name__, e.message)
+            except Exception as e:
+                logger.exception("Scraper worker: scrape of %s failed: %s", username, e)
+                error = (InstagramScraperError.__name__, ErrorMessage.EXTRACTING_PHOTOS.format(username))
+        self.send(('result', job_id, links, error, timings.phases))
+        self.jobs_done += 1
+        self.report()
+
+    def report(self) -> None:
+        rss = tree_rss(os.getpid())
+        self.send(('status', {
+            'pid': os.getpid(),
+            'jobs_done': self.jobs_done,
+            'rss': rss,
+            'backend': self.backend.stats(),
+        }))
+        if self.retiring:
+            return
+        if self.max_jobs and self.jobs_done >= self.max_jobs:
+            reason = f'{self.jobs_done} jobs done'
+        elif self.max_rss and rss > self.max_rss:
+            reason = f'{rss // 2 ** 20} MB resident'
+        else:
+            return
+        self.retiring = True
+        self.send(('retiring', reason))
+
+
+# API process side
+
+
+class _Job:
+    def __init__(self, username: str, links: asyncio.Queue | None):
+        self.username = username
+        self.links = links
+        # Resolves to (links, error, phases)
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class WorkerProcess:
+    """ A worker process as seen from the API process """
+
+    def __init__(self, process: multiprocessing.Process, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.jobs: dict[int, _Job] = {}
+        self.retiring = False
+        self.status: dict = {}
+
+
+class ProcessBackend(ScraperBackend):
+    """
+    Runs a backend in separate worker processes, so browsers never share memory or crashes with the API.
+    The API process only sends requests and receives links over a pipe per worker.
+
+    Workers are recycled after `max_jobs` scrapes or once they and their browsers use more than `max_rss` bytes,
+    a worker which dies is replaced and its scrapes fail.
+    """
+
+    def __init__(self, backend: str, processes: int, max_jobs: int = 0, max_rss: int = 0):
+        # Named like the backend it runs, so rate limits and breakers don't change with the mode
+        self.name = backend
+        self.processes = processes
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.workers: list[WorkerProcess] = []
+        self._context = multiprocessing.get_context('spawn')
+        self._job_ids = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing = False
+        self._spawned_total = 0
+        self._recycled_total = 0
+        self._crashed_total = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings, backend: str = 'selenium') -> 'ProcessBackend':
+        return cls(
+            backend=backend,
+            processes=settings.scraper_worker_processes,
+            max_jobs=settings.scraper_worker_max_jobs,
+            max_rss=settings.scraper_worker_max_rss_mb * 2 ** 20,
+        )
+
+    async def start(self) -> None:
+        self._start()
+
+    def _start(self) -> None:
+        # Backends other than the default one are started by their first scrape
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            for _ in range(self.processes):
+                self._spawn()
+
+    def _spawn(self) -> None:
+        if self._closing:
+            return
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(child_conn, self.name, self.max_jobs, self.max_rss),
+            name=f'scraper-{self.name}',
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = WorkerProcess(process, conn)
+        self.workers.append(worker)
+        self._spawned_total += 1
+        threading.Thread(target=self._read, args=(worker,), name='scraper-worker-reader', daemon=True).start()
+
+    def _read(self, worker: WorkerProcess) -> None:
+        """ Receives messages of one worker in a thread and hands them over to the event loop """
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                message = None
+            try:
+                if message is None:
+                    self._loop.call_soon_threadsafe(self._on_exit, worker)
+                    return
+                self._loop.call_soon_threadsafe(self._on_message, worker, message)
+            except RuntimeError:
+                # The event loop is closed, the app has stopped
+                return
+
+    def _on_message(self, worker: WorkerProcess, message: tuple) -> None:
+        kind = message[0]
+        if kind == 'link':
+            job = worker.jobs.get(message[1])
+            if job is not None and job.links is not None:
+                job.links.put_nowait(message[2])
+        elif kind == 'result':
+            _, job_id, links, error, phases = message
+            job = worker.jobs.pop(job_id, None)
+            if job is not None and not job.future.done():
+                job.future.set_result((links, error, phases))
+        elif kind == 'status':
+            worker.status = message[1]
+        elif kind == 'retiring':
+            # Jobs sent before the stop message are still done, the replacement takes new ones
+            logger.info("Scraper worker %s is recycled: %s", worker.process.pid, message[1])
+            worker.retiring = True
+            self._recycled_total += 1
+            self._send(worker, ('stop',))
+            self._spawn()
+
+    def _on_exit(self, worker: WorkerProcess) -> None:
+        if worker in self.workers:
+            self.workers.remove(worker)
+        worker.conn.close()
+        for job in worker.jobs.values():
+            if not job.future.done():
+                error = (InstagramScraperError.__name__, ErrorMessage.EXTRACTING_PHOTOS.format(job.username))
+                job.future.set_result(([], error, {}))
+        worker.jobs.clear()
+        self._loop.run_in_executor(None, worker.process.join)
+        if not worker.retiring and not self._closing:
+            logger.error("Scraper worker %s exited unexpectedly", worker.process.pid)
+            self._crashed_total += 1
+            # Delayed, so a worker which dies on startup doesn't respawn in a tight loop
+            self._loop.call_later(1, self._spawn)
+
+    @staticmethod
+    def _send(worker: WorkerProcess, message: tuple) -> bool:
+        try:
+            worker.conn.send(message)
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def _submit(self, username: str, max_count: int | None, stop_at: frozenset,
+                links: asyncio.Queue | None = None) -> tuple:
+        """ Send the scrape to the least busy worker, returns the worker and the job """
+        self._start()
+        workers = [worker for worker in self.workers if not worker.retiring]
+        if not workers:
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_BUSY)
+        worker = min(workers, key=lambda w: len(w.jobs))
+        job_id = next(self._job_ids)
+        job = worker.jobs[job_id] = _Job(username, links)
+        if not self._send(worker, ('scrape', job_id, username, max_count, stop_at, links is not None)):
+            del worker.jobs[job_id]
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_BUSY)
+        return worker, job_id, job
+
+    def _cancel(self, worker: WorkerProcess, job_id: int) -> None:
+        if worker.jobs.pop(job_id, None) is not None:
+            self._send(worker, ('cancel', job_id))
+
+    @staticmethod
+    def _result(links: list, error: tuple | None, phases: dict) -> list:
+        """ Record the phases of the worker in the caller's timings, raise its error if there was one """
+        for name, seconds in phases.items():
+            record(name, seconds)
+        if error is not None:
+            name, message = error
+            raise ERRORS.get(name, InstagramScraperError)(message)
+        return links
+
+    async def extract_photos(self, username: str, max_count: int | None, stop_at: frozenset = frozenset()) -> list:
+        worker, job_id, job = self._submit(username, max_count, stop_at)
+        try:
+            return self._result(*await job.future)
+        except asyncio.CancelledError:
+            self._cancel(worker, job_id)
+            raise
+
+    async def iter_photos(self, username: str, max_count: int | None,
+                          stop_at: frozenset = frozenset()) -> AsyncIterator[str]:
+        links: asyncio.Queue = asyncio.Queue()
+        worker, job_id, job = self._submit(username, max_count, stop_at, links)
+        # Links are handed over before the result, so the end marker comes last
+        job.future.add_done_callback(lambda _: links.put_nowait(None))
+        try:
+            while (link := await links.get()) is not None:
+                yield link
+            self._result(*job.future.result())
+        finally:
+            if not job.future.done():
+                self._cancel(worker, job_id)
+
+    async def close(self) -> None:
+        self._closing = True
+        for worker in self.workers:
+            self._send(worker, ('stop',))
+        await asyncio.get_running_loop().run_in_executor(None, self._join)
+
+    def _join(self, timeout: float = 10) -> None:
+        for worker in list(self.workers):
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def stats(self) -> dict:
+        return {
+            'processes': self.processes,
+            'spawned_total': self._spawned_total,
+            'recycled_total': self._recycled_total,
+            'crashed_total': self._crashed_total,
+            'workers': [
+                {
+                    'pid': worker.process.pid,
+                    'in_flight': len(worker.jobs),
+                    'retiring': worker.retiring,
+                    **worker.status,
+                }
+                for worker in self.workers
+            ],
+        }
@@ -0,0 +1,310 @@
+# Standard library
+import random
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator
+from functools import lru_cache, partial
+
+# Selenium
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
+
+# Custom modules
+from messages import ErrorMessage
+from settings import Settings, get_settings
+from services.drivers import CHROME_DRIVER_PATH, ChromeDriverPool, DriverPoolTimeout
+from utils.metrics import phase
+from utils.executors import BoundedExecutor, ExecutorBusy
+from ._base import (INSTAGRAM_URL, PAGE_NOT_AVAILABLE, USER_AGENTS, InstagramAccountError,
+                    InstagramAccountNotFoundError, InstagramScraperError, ScraperBackend, ScraperUnavailableError, KnownPostsRun,
+                    extract_shortcode)
+
+# Links of the posts grid
+POST_LINKS_SELECTOR = "article a[href]"
+# All hrefs in one round trip to the browser instead of one get_attribute call per element
+POST_LINKS_SCRIPT = f"return Array.from(document.querySelectorAll({POST_LINKS_SELECTOR!r}), a => a.href);"
+# Header with the name and counters of the profile, rendered for private and empty profiles too,
+# but not on the login wall
+PROFILE_HEADER_SCRIPT = "return document.querySelector('main header') !== null;"
+PRIVATE_ACCOUNT_TEXT = "this account is private"
+
+
+# URL patterns blocked in lean load mode, by resource type. Only `href` attributes of the posts are read,
+# so nothing of this is needed to extract photos.
+BLOCKED_URL_PATTERNS = {
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.heic*', '*.svg*', '*.ico*'],
+    'media': ['*.mp4*', '*.m4s*', '*.webm*', '*.m3u8*', '*.mp3*', '*.aac*'],
+    'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*'],
+    'stylesheet': ['*.css*'],
+    'third_party': [
+        '*connect.facebook.net*',
+        '*facebook.com/tr*',
+        '*google-analytics.com*',
+        '*googletagmanager.com*',
+        '*doubleclick.net*',
+        '*graph.instagram.com/logging*',
+    ],
+}
+
+
+def get_chrome_options(lean_load: bool = False, blocked_resources: tuple = ()) -> webdriver.ChromeOptions:
+    """
+    Configure and return chrome options for selenium driver.
+    """
+    # Set up Chrome options
+    options = webdriver.ChromeOptions()
+
+    # Run Chrome in headless mode (without opening a GUI window)
+    options.add_argument('--headless')
+
+    # for docker
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    # Start Chrome maximized. This is useful for ensuring that the browser starts
+    # in a consistent state, especially when automating.
+    options.add_argument("start-maximized")
+
+    # "enable-automation" is a flag that indicates the browser is being controlled by automated software.
+    # "enable-logging" flag controls logging. Disabling both provides a smoother automation experience.
+    options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+
+    # Disabling the use of an automation extension, making our scraping activities less detectable.
+    options.add_experimental_option('useAutomationExtension', False)
+
+    # Disables a JavaScript feature called AutomationControlled, making scraping less detectable.
+    options.add_argument('--disable-blink-features=AutomationControlled')
+
+    # Choose a random User-Agent from the list. User-Agent defines the browser's type, version,
+    # and other attributes. By randomizing it, we are trying to mimic the behavior of different browsers,
+    # making it harder for websites to identify our scraper based on a static User-Agent.
+    options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
+
+    if lean_load:
+        # driver.get returns once the DOM is ready, without waiting for images, frames and async scripts.
+        options.page_load_strategy = 'eager'
+        if 'image' in blocked_resources:
+            # Images are not even requested by the renderer
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    return options
+
+
+def iter_photo_links(driver: webdriver.Chrome, username: str, max_count: int | None, wait_timeout: float,
+                     scroll_timeout: float, max_scrolls: int, stop_at: frozenset = frozenset()) -> Iterator[str]:
+    """
+    Yields post URLs of the profile as they render, scrolling only while more links are needed.
+
+    :param driver: Chrome session.
+    :param username: Username for instagram account.
+    :param max_count: Stop once this many unique posts were found, None to scroll until the end.
+    :param wait_timeout: Seconds to wait for the first posts.
+    :param scroll_timeout: Seconds to wait for new posts after a scroll.
+    :param max_scrolls: Upper bound of scrolls per profile.
+    :param stop_at: Shortcodes of stored posts, the scrape ends after a run of them (see KnownPostsRun).
+    """
+    with phase('page_load'):
+        driver.get(f"{INSTAGRAM_URL}/{username}/")
+
+    def collect() -> list:
+        return [link for link in driver.execute_script(POST_LINKS_SCRIPT) if extract_shortcode(link)]
+
+    # Wait for the first posts or for the "not available" page, whatever comes first
+    try:
+        with phase('first_posts'):
+            links = WebDriverWait(driver, wait_timeout).until(
+                lambda d: collect() or PAGE_NOT_AVAILABLE in d.page_source
+            )
+    except TimeoutException:
+        # A profile without posts to show is an answer of Instagram, not a failure of the scraper
+        if not driver.execute_script(PROFILE_HEADER_SCRIPT):
+            raise
+        if PRIVATE_ACCOUNT_TEXT in driver.page_source.lower():
+            raise InstagramAccountError(ErrorMessage.PRIVATE_ACCOUNT.format(username))
+        raise InstagramAccountError(ErrorMessage.NO_POSTS.format(username))
+    if links is True:
+        raise InstagramAccountNotFoundError(ErrorMessage.ACCOUNT_NOT_FOUND.format(username))
+
+    seen = set()
+    known_run = KnownPostsRun(stop_at)
+    scrolls = 0
+    while True:
+        for link in links:
+            shortcode = extract_shortcode(link)
+            if shortcode in seen:
+                continue
+            seen.add(shortcode)
+            yield link
+            if known_run.reached(shortcode) or (max_count is not None and len(seen) >= max_count):
+                return
+
+        if scrolls >= max_scrolls:
+            return
+        scrolls += 1
+        rendered = len(links)
+
+        def more_rendered(d: webdriver.Chrome) -> list | bool:
+            found = collect()
+            return found if len(found) != rendered else False
+
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            with phase('scroll'):
+                links = WebDriverWait(driver, scroll_timeout, poll_frequency=0.2).until(more_rendered)
+        except TimeoutException:
+            # Nothing new rendered, the end of the profile
+            return
+
+
+def block_resources(driver: webdriver.Chrome, blocked_resources: tuple) -> None:
+    """
+    Make Chrome fail requests of the given resource types, the block stays for the life of the session.
+    """
+    patterns = [pattern for resource in blocked_resources for pattern in BLOCKED_URL_PATTERNS[resource]]
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+
+class SeleniumBackend(ScraperBackend):
+    """
+    Scrapes the profile page in headless Chrome, sessions are taken from the driver pool.
+    """
+
+    name = 'selenium'
+    isolated = True
+
+    def __init__(self, pool: ChromeDriverPool, executor: BoundedExecutor, wait_timeout: float = 10,
+                 scroll_timeout: float = 3, max_scrolls: int = 50):
+        self.pool = pool
+        self.executor = executor
+        self.wait_timeout = wait_timeout
+        self.scroll_timeout = scroll_timeout
+        self.max_scrolls = max_scrolls
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'SeleniumBackend':
+        return cls(
+            pool=get_driver_pool(),
+            executor=get_scraper_executor(),
+            wait_timeout=settings.scraper_wait_timeout,
+            scroll_timeout=settings.scraper_scroll_timeout,
+            max_scrolls=settings.scraper_max_scrolls,
+        )
+
+    async def extract_photos(self, username: str, max_count: int | None, stop_at: frozenset = frozenset()) -> list:
+        """
+        Selenium calls are blocking, so they run in the scraper executor and the event loop stays free.
+        """
+        return await self._run(username, max_count, stop_at)
+
+    async def iter_photos(self, username: str, max_count: int | None,
+                          stop_at: frozenset = frozenset()) -> AsyncIterator[str]:
+        """
+        Links found by the worker thread are handed over to the event loop one by one. When the consumer
+        stops early the worker stops scrolling and gives the browser back.
+        """
+        loop = asyncio.get_running_loop()
+        links: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        task = asyncio.ensure_future(self._run(
+            username, max_count, stop_at,
+            on_link=lambda link: loop.call_soon_threadsafe(links.put_nowait, link),
+            stop=stop,
+        ))
+        # Links are queued with call_soon_threadsafe before the result, so the end marker comes last
+        task.add_done_callback(lambda _: links.put_nowait(None))
+        try:
+            while (link := await links.get()) is not None:
+                yield link
+            # Raises the scraper error if there was one
+            await task
+        finally:
+            stop.set()
+            if not task.done():
+                # Nobody awaits the task anymore, its result is only retrieved so it isn't reported
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _run(self, username: str, max_count: int | None, stop_at: frozenset, on_link: Callable | None = None,
+                   stop: threading.Event | None = None) -> list:
+        try:
+            return await self.executor.run(self._extract_photos_sync, username, max_count, stop_at, on_link, stop)
+        except ExecutorBusy:
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_BUSY)
+
+    def _extract_photos_sync(self, username: str, max_count: int | None, stop_at: frozenset = frozenset(),
+                             on_link: Callable | None = None, stop: threading.Event | None = None) -> list:
+        """
+        Blocking part of extract_photos, runs in a worker thread.
+
+        :param on_link: Called with every link as soon as it is found.
+        :param stop: Collecting ends early once the event is set.
+        """
+        photo_links = []
+        try:
+            with self.pool.session() as driver:
+                for link in iter_photo_links(
+                    driver, username, max_count, self.wait_timeout, self.scroll_timeout, self.max_scrolls, stop_at,
+                ):
+                    photo_links.append(link)
+                    if on_link is not None:
+                        on_link(link)
+                    if stop is not None and stop.is_set():
+                        break
+        except InstagramScraperError:
+            raise
+        except DriverPoolTimeout:
+            # All browsers are busy, this says nothing about Instagram
+            raise ScraperUnavailableError(ErrorMessage.SCRAPER_BUSY)
+        except Exception as e:
+            # raise the exception and print for log
+            print(f"ERROR: extract_photos: {str(e)}")
+            raise InstagramScraperError(ErrorMessage.EXTRACTING_PHOTOS.format(username))
+        return photo_links
+
+    async def start(self) -> None:
+        # Browsers start in the background, the app doesn't wait for them
+        asyncio.get_running_loop().run_in_executor(None, self.pool.warm)
+
+    async def close(self) -> None:
+        self.executor.shutdown()
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+
+    def stats(self) -> dict:
+        return {
+            'executor': self.executor.stats(),
+            'driver_pool': self.pool.stats(),
+        }
+
+
+@lru_cache
+def get_driver_pool() -> ChromeDriverPool:
+    """ Process-wide pool of Chrome sessions shared by all scrapes """
+    settings = get_settings()
+    lean_load = settings.scraper_lean_load
+    blocked_resources = tuple(settings.scraper_blocked_resources) if lean_load else ()
+    unknown = set(blocked_resources) - set(BLOCKED_URL_PATTERNS)
+    if unknown:
+        raise ValueError(f"Unknown resource types to block: {', '.join(sorted(unknown))}. "
+                         f"Use: {', '.join(BLOCKED_URL_PATTERNS)}.")
+    return ChromeDriverPool(
+        driver_path=CHROME_DRIVER_PATH,
+        options_factory=partial(get_chrome_options, lean_load, blocked_resources),
+        size=settings.scraper_pool_size,
+        idle_timeout=settings.scraper_pool_idle_timeout,
+        max_pages=settings.scraper_pool_max_pages,
+        checkout_timeout=settings.scraper_pool_checkout_timeout,
+        setup=partial(block_resources, blocked_resources=blocked_resources) if blocked_resources else None,
+    )
+
+
+@lru_cache
+def get_scraper_executor() -> BoundedExecutor:
+    """ Worker threads for blocking selenium calls, separate from the default executor """
+    settings = get_settings()
+    return BoundedExecutor(
+        name='scraper',
+        max_workers=settings.scraper_workers,
+        max_queue=settings.scraper_max_queue,
+    )
@@ -0,0 +1,88 @@
+# Standard library imports
+import time
+from functools import lru_cache
+
+# Third-party imports
+from starlette.requests import HTTPConnection
+from limits import RateLimitItem, parse
+from limits.storage import storage_from_string
+from limits.aio.strategies import MovingWindowRateLimiter
+
+# Project-specific imports
+from settings import get_settings
+from messages import ErrorMessage
+from gql.exceptions import TooManyRequestsError
+
+
+class AuthThrottle:
+    """
+    Moving window limits of login and registration attempts, per client IP and per email.
+    Attempts are counted before the password is checked, so rejected ones cost no bcrypt work.
+    """
+
+    def __init__(self, storage_uri: str, limits: dict[str, tuple[str, str]]):
+        """
+        :param storage_uri: Storage of the counters, see limits.storage.storage_from_string.
+        :param limits: Limits per IP and per email by action, like {'login': ('30/minute', '10/minute')}.
+        """
+        self.storage = storage_from_string(storage_uri)
+        self.limiter = MovingWindowRateLimiter(self.storage)
+        self.limits: dict[str, tuple[RateLimitItem, RateLimitItem]] = {
+            action: (parse(ip_limit), parse(email_limit)) for action, (ip_limit, email_limit) in limits.items()
+        }
+
+        # Counters for monitoring
+        self._allowed_total = dict.fromkeys(limits, 0)
+        self._rejected_total = dict.fromkeys(limits, 0)
+
+    @classmethod
+    def from_settings(cls, settings) -> 'AuthThrottle':
+        return cls(
+            storage_uri=settings.auth_throttle_storage,
+            limits={
+                'login': (settings.login_ip_limit, settings.login_email_limit),
+                'register': (settings.register_ip_limit, settings.register_email_limit),
+            },
+        )
+
+    async def check(self, action: str, ip: str | None, email: str | None) -> None:
+        """
+        Count an attempt of the action, raises TooManyRequestsError if the IP or the email is over its limit.
+        """
+        ip_limit, email_limit = self.limits[action]
+        for limit, kind, key in ((ip_limit, 'ip', ip), (email_limit, 'email', (email or '').strip().lower())):
+            if not key:
+                continue
+            if not await self.limiter.hit(limit, action, kind, key):
+                self._rejected_total[action] += 1
+                reset_time, _ = await self.limiter.get_window_stats(limit, action, kind, key)
+                retry_after = max(1, int(reset_time - time.time()))
+                message = {'non_field': ErrorMessage.TOO_MANY_ATTEMPTS['non_field'].format(retry_after)}
+                raise TooManyRequestsError(message, retry_after=retry_after)
+        self._allowed_total[action] += 1
+
+    def stats(self) -> dict:
+        return {
+            action: {
+                'ip_limit': str(ip_limit),
+                'email_limit': str(email_limit),
+                'allowed_total': self._allowed_total[action],
+                'rejected_total': self._rejected_total[action],
+            }
+            for action, (ip_limit, email_limit) in self.limits.items()
+        }
+
+
+def client_ip(connection: HTTPConnection | None) -> str | None:
+    """
+    Address of the client. Behind a proxy uvicorn takes it from X-Forwarded-For (--proxy-headers), trusted only
+    from FORWARDED_ALLOW_IPS, which must not be "*" or every client could choose the IP it is limited by.
+    """
+    if connection is None or connection.client is None:
+        return None
+    return connection.client.host
+
+
+@lru_cache
+def get_auth_throttle() -> AuthThrottle:
+    return AuthThrottle.from_settings(get_settings())
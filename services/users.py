@@ -1,22 +1,29 @@
 # Standard library imports
-from typing import List, Any
+from typing import Any
+from functools import lru_cache
 from datetime import datetime, timedelta
 
 # Third-party imports
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # SQLAlchemy imports
-from sqlalchemy import select
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import make_transient_to_detached
 
 # Project-specific imports
 from settings import get_settings
 from messages import ErrorMessage
 from db.models._users import UserModel
-from gql.base.types import MessageType, RefreshTokenInput
+from gql.base.types import MessageType, RefreshTokenInput, Connection
 from gql.exceptions import FoundError, GQLError, ValidationError
-from services.validators import validate_user_data, validate_password
-from utils.auth import decode_token, get_password_hash, verify_password, create_access_token
-from gql.users.types import UserInput, UserType, LoginInput, LoginSuccessType, ChangePasswordInput, UserRegisterInput
+from services.validators import validate_user_data, validate_password, validate_page_size
+from utils.auth import (decode_token, get_password_hash_async, verify_password_async, verify_and_update_password_async,
+                        create_access_token)
+from utils.cache import TTLCache
+from services.throttling import get_auth_throttle
+from utils.pagination import fetch_page
+from gql.users.types import (UserInput, UserType, LoginInput, LoginSuccessType, ChangePasswordInput, UserRegisterInput,
+                             UserFilterInput)
 
 
 # Queries functions ##
@@ -33,20 +40,38 @@ async def get(session: AsyncSession, email: str = None,
     return result.scalars().first()
 
 
-async def get_users(session: AsyncSession) -> List[UserType]:
-    """ Getting list of users """
+async def get_by_ids(session: AsyncSession, user_ids: list) -> dict:
+    """ Getting users by id with one query """
+    result = await session.execute(select(UserModel).where(UserModel.id.in_(user_ids)))
+    return {user.id: user for user in result.scalars().all()}
+
+
+async def get_users(session: AsyncSession, first: int | None = None, after: str | None = None,
+                    filters: UserFilterInput | None = None) -> Connection[UserType]:
+    """ Getting page of users in the order they registered """
 
     query = select(UserModel)
-    result = await session.execute(query)
-    return result.scalars().unique().all()
+    if filters is not None:
+        if filters.email:
+            query = query.where(UserModel.email.startswith(filters.email, autoescape=True))
+        if filters.is_active is not None:
+            query = query.where(UserModel.is_active == filters.is_active)
+    try:
+        users, has_next_page = await fetch_page(
+            session, query, UserModel.created_at, UserModel.id, validate_page_size(first), after,
+        )
+    except ValueError:
+        raise ValidationError({'after': ErrorMessage.INVALID_CURSOR})
+    return Connection.from_page(users, has_next_page)
 
 
 # Mutations functions ##
 
 
-async def register_user(data: UserRegisterInput, session: AsyncSession) -> MessageType:
+async def register_user(data: UserRegisterInput, session: AsyncSession, ip: str | None = None) -> MessageType:
     """Creating User by email and password"""
 
+    await get_auth_throttle().check('register', ip, data.email)
     user_data = data.__dict__
     password = user_data.pop('password')
     email = user_data.get('email')
@@ -56,7 +81,7 @@ async def register_user(data: UserRegisterInput, session: AsyncSession) -> Messa
 
     # Create instance for User
     user = UserModel(**user_data)
-    user.hashed_password = get_password_hash(password)
+    user.hashed_password = await get_password_hash_async(password)
     session.add(user)
     await session.commit()
     return MessageType(message='User was created')
@@ -75,6 +100,7 @@ async def update(data: UserInput, session: AsyncSession,
         raise ValidationError('Email already exists')
     user.updated_at = datetime.utcnow()
     await session.commit()
+    invalidate_principal(user.id)
     return user
 
 
@@ -83,16 +109,18 @@ async def delete_user(session: AsyncSession, user: UserModel) -> MessageType:
 
     await session.delete(user)
     await session.commit()
+    invalidate_principal(user.id)
     return MessageType(message=f'User was deleted: {user.email}')
 
 
-async def login(data: LoginInput, session: AsyncSession) -> LoginSuccessType:
+async def login(data: LoginInput, session: AsyncSession, ip: str | None = None) -> LoginSuccessType:
     """ User authentication """
 
+    await get_auth_throttle().check('login', ip, data.email)
     user = await get(session, data.email.lower())
     if not user:
         raise ValidationError(ErrorMessage.USER_NOT_EXISTS)
-    if not verify_password(data.password, user.hashed_password):
+    if not await check_password(session, user, data.password):
         raise ValidationError(ErrorMessage.INCORRECT_PASSWORD)
     return await create_tokens(user)
 
@@ -108,13 +136,14 @@ async def refresh_token(data: RefreshTokenInput,
     return await create_tokens(user)
 
 
-async def login_admin(data: LoginInput, session: AsyncSession) -> str:
+async def login_admin(data: LoginInput, session: AsyncSession, ip: str | None = None) -> str:
     """ User authentication: admin panel """
 
+    await get_auth_throttle().check('login', ip, data.email)
     user = await get(session, email=data.email)
     if not user:
         raise FoundError(ErrorMessage.USER_NOT_EXISTS)
-    if not verify_password(data.password, user.hashed_password):
+    if not await check_password(session, user, data.password):
         raise ValidationError(ErrorMessage.INCORRECT_PASSWORD)
     errors = {}
     if not user.is_superuser:
@@ -129,16 +158,57 @@ async def login_admin(data: LoginInput, session: AsyncSession) -> str:
     )
 
 
-async def get_current_user(token: str, session: AsyncSession) -> UserType:
-    """ Getting current user by token """
+async def check_password(session: AsyncSession, user: UserModel, password: str) -> bool:
+    """ Checking password of the user, a hash with outdated parameters is replaced with a new one """
 
-    user_id = decode_token(token)
-    user = await get(session, user_id=int(user_id))
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if verified and new_hash is not None:
+        user.hashed_password = new_hash
+        await session.commit()
+        # Callers read the user after the check, sessions which expire on commit would load it lazily
+        await session.refresh(user)
+        invalidate_principal(user.id)
+    return verified
+
+
+async def get_current_user(token: str, session: AsyncSession) -> UserType:
+    """ Getting current user by token, users are cached for `principal_cache_ttl` seconds """
+
+    user_id = int(decode_token(token))
+    principals = get_principal_cache()
+    columns = principals.get(user_id)
+    if columns is not None:
+        return await _from_columns(session, columns)
+    user = await get(session, user_id=user_id)
     if user is None:
         raise FoundError(ErrorMessage.USER_NOT_EXISTS)
+    principals.set(user_id, _to_columns(user))
     return user
 
 
+def _to_columns(user: UserModel) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(UserModel).column_attrs}
+
+
+async def _from_columns(session: AsyncSession, columns: dict) -> UserModel:
+    """ User attached to the session as if it was loaded from the database, without a query """
+    user = UserModel(**columns)
+    make_transient_to_detached(user)
+    return await session.merge(user, load=False)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """ Forget the cached user, call it after every change of a user """
+    get_principal_cache().pop(user_id)
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache:
+    """ Columns of authenticated users by id. Other processes keep their copy until it expires """
+    settings = get_settings()
+    return TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+
+
 async def create_tokens(user: UserModel) -> LoginSuccessType:
 
     access_token = create_access_token(
@@ -157,15 +227,16 @@ async def create_tokens(user: UserModel) -> LoginSuccessType:
 async def change_password(user: UserModel, data: ChangePasswordInput, session: AsyncSession) -> MessageType:
     """ Change user password  """
     current_password = data.current_password
-    if not verify_password(current_password, user.hashed_password):
+    if not await verify_password_async(current_password, user.hashed_password):
         raise ValidationError(ErrorMessage.CURRENT_PASSWORD)
     elif current_password == data.password:
         raise ValidationError({'password': 'You cannot change your password to an existing one.'})
 
     new_password = data.password
     password = validate_password(new_password)
-    user.hashed_password = get_password_hash(password)
+    user.hashed_password = await get_password_hash_async(password)
     await session.commit()
+    invalidate_principal(user.id)
     await session.refresh(user)
     return MessageType(message='Password changed successfully')
 
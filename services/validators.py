@@ -7,6 +7,7 @@ from starlette.exceptions import HTTPException
 from email_validator import validate_email
 
 # Project-specific imports
+from settings import get_settings
 from messages import ErrorMessage
 from gql.exceptions import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,6 +26,16 @@ def validate_password_server(value):
     return value
 
 
+def validate_page_size(first: int | None) -> int:
+    """ Number of items of a page, the default one if the request doesn't set it """
+    settings = get_settings()
+    if first is None:
+        return settings.page_size
+    if not 1 <= first <= settings.page_max_size:
+        raise ValidationError({'first': ErrorMessage.INVALID_PAGE_SIZE.format(settings.page_max_size)})
+    return first
+
+
 def validate_password(value):
     # need this for website and if password is wrong return message
     password_regex = re.compile(r'^(?=.*\d)(?=.*[a-z])(?=.*[A-Z]).{8,}$')
@@ -14,12 +14,103 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 36000
     refresh_token_expire_days: int = 30
 
+    # Verified JWT claims by token, an entry lives until the token expires but no longer than the ttl
+    token_cache_size: int = 10000  # tokens, 0 disables the cache
+    token_cache_ttl: int = 300  # seconds
+
+    # Login and registration attempts per client IP and per email, checked before any password work.
+    # Limits use the notation of the `limits` package, the storage can be shared by processes, e.g. async+redis://
+    auth_throttle_storage: str = 'async+memory://'
+    login_ip_limit: str = '30/minute'
+    login_email_limit: str = '10/minute'
+    register_ip_limit: str = '10/hour'
+    register_email_limit: str = '3/hour'
+
+    # Threads hashing and checking passwords, bcrypt releases the GIL so they use several cores
+    password_workers: int = os.cpu_count() or 2
+    password_max_queue: int = 100  # password checks waiting for a thread before new ones are rejected
+    # Cost of new password hashes, pick it with calibratebcrypt.py on the deployment machine.
+    # Hashes with fewer rounds are upgraded at the next login
+    bcrypt_rounds: int = 12
+
     db_host: str = os.getenv('DB_HOST') or 'localhost'
     db_port: str = os.getenv('DB_PORT') or 5432
     db_database: str = os.getenv('DB_DATABASE') or 'glam'
     db_username: str = os.getenv('DB_USERNAME') or 'glam_user'
     db_password: str = os.getenv('DB_PASSWORD') or 'postgres'
 
+    # Instagram scraper: backend used when the request doesn't choose one, 'selenium' or 'http'
+    scraper_backend: str = 'selenium'
+    instagram_base_url: str = 'https://www.instagram.com'
+    scraper_http_timeout: float = 10  # seconds
+
+    # Instagram scraper: pool of reusable Chrome sessions
+    scraper_pool_size: int = 2
+    scraper_pool_idle_timeout: int = 300  # seconds before an idle session is closed
+    scraper_pool_max_pages: int = 50  # pages served by one session before it is recycled
+    scraper_pool_checkout_timeout: int = 30  # seconds to wait for a free session
+
+    # Instagram scraper: collecting of posts
+    scraper_wait_timeout: float = 10  # seconds to wait for the first posts
+    scraper_scroll_timeout: float = 3  # seconds to wait for more posts after a scroll
+    scraper_max_scrolls: int = 50
+
+    # Instagram scraper: lean load mode, pages are used as soon as the DOM is ready and the listed
+    # resource types are not downloaded: image, media, font, stylesheet, third_party
+    scraper_lean_load: bool = False
+    scraper_blocked_resources: list[str] = ['image', 'media', 'font', 'third_party']
+
+    # Instagram scraper: separate processes running the browsers, 0 runs them in the API process
+    scraper_worker_processes: int = 0
+    scraper_worker_max_jobs: int = 200  # scrapes before a worker process is replaced, 0 for no limit
+    scraper_worker_max_rss_mb: int = 2048  # memory of a worker with its browsers before it is replaced, 0 for no limit
+
+    # Instagram scraper: threads running blocking selenium calls
+    scraper_workers: int = 2
+    scraper_max_queue: int = 20  # scrapes waiting for a worker before new ones are rejected
+
+    # Instagram scraper: cache of scrape results
+    scraper_cache_ttl: int = 600  # seconds a scrape result is served without scraping again
+    scraper_cache_size: int = 1024  # accounts kept in memory
+    scraper_not_found_ttl: int = 3600  # seconds an account which doesn't exist is not scraped again
+    scraper_not_found_cache_size: int = 10000
+    # stop scraping at the first stored post and take the following ones from the latest stored scrape
+    scraper_incremental: bool = True
+
+    # Instagram scraper: rate limits and circuit breaker
+    scraper_rate_limit: float = 1  # scrapes per second on average, all accounts together
+    scraper_rate_burst: int = 10
+    scraper_account_rate_limit: float = 0.1  # scrapes per second on average of one account
+    scraper_account_rate_burst: int = 3
+    scrape_guard_max_accounts: int = 10000  # accounts whose rate limit is tracked, the least recent ones are dropped
+    scraper_breaker_failures: int = 5  # consecutive failed scrapes which pause the backend
+    scraper_breaker_reset_timeout: int = 60  # seconds the backend is paused
+
+    # Instagram scraper: timings of the scrape phases
+    scraper_slow_threshold: float = 10  # seconds, slower scrapes are logged with their phase timings
+    graphql_timings: bool = False  # add phase timings to the `extensions` of GraphQL responses
+
+    # Batch scraping (getPhotosBatch)
+    scraper_batch_concurrency: int = 4  # accounts scraped at the same time by one request
+    scraper_batch_max_size: int = 500  # accounts in one request
+
+    # Authenticated users cache, changes made by other processes are seen after the ttl
+    principal_cache_size: int = 10000  # users, 0 disables the cache
+    principal_cache_ttl: int = 60  # seconds
+
+    # Pagination of lists (usersList)
+    page_size: int = 20  # items of a page if the request doesn't set `first`
+    page_max_size: int = 100
+
+    # Search in stored scrapes (searchPhotos)
+    photo_search_max_results: int = 100
+
+    # Background scrape jobs (startPhotoScrape)
+    scrape_job_workers: int = 2
+    # Running jobs started longer ago are queued again, their process is taken as dead. Keep it above
+    # the longest scrape, a job still running in a live process would be scraped twice
+    scrape_job_stale_timeout: int = 900  # seconds
+
     @property
     def db_url(self) -> str:
         return (
@@ -1,4 +1,7 @@
+import time
+import hashlib
 from settings import get_settings
+from functools import lru_cache
 from datetime import datetime, timedelta
 
 from passlib.context import CryptContext
@@ -6,12 +9,17 @@ from jose import jwt, ExpiredSignatureError, JWTError
 
 from messages import ErrorMessage
 from gql.exceptions import AuthenticationError, FoundError, GQLError
+from utils.cache import TTLCache
+from utils.executors import BoundedExecutor, ExecutorBusy
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# Hashes with fewer rounds than `bcrypt_rounds` need an update, stronger ones are kept
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__default_rounds=get_settings().bcrypt_rounds,
+    bcrypt__min_rounds=get_settings().bcrypt_rounds,
+)
 
 
 def get_password_hash(password):
@@ -25,6 +33,49 @@ def verify_password(plain_password, hashed_password):
         return False
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """ Checks the password, returns a new hash too if the stored one has outdated parameters """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return False, None
+
+
+@lru_cache
+def get_password_executor() -> BoundedExecutor:
+    """ Worker threads for bcrypt, which would block the event loop for the whole hashing """
+    settings = get_settings()
+    return BoundedExecutor(
+        name='password',
+        max_workers=settings.password_workers,
+        max_queue=settings.password_max_queue,
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """ get_password_hash in the password executor """
+    try:
+        return await get_password_executor().run(get_password_hash, password)
+    except ExecutorBusy:
+        raise GQLError(ErrorMessage.PASSWORD_BUSY)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """ verify_password in the password executor """
+    try:
+        return await get_password_executor().run(verify_password, plain_password, hashed_password)
+    except ExecutorBusy:
+        raise GQLError(ErrorMessage.PASSWORD_BUSY)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """ verify_and_update_password in the password executor """
+    try:
+        return await get_password_executor().run(verify_and_update_password, plain_password, hashed_password)
+    except ExecutorBusy:
+        raise GQLError(ErrorMessage.PASSWORD_BUSY)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -37,10 +88,32 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def decode_token(token: str) -> str:
-    try:
+@lru_cache
+def get_token_cache() -> TTLCache:
+    """ Verified claims by sha256 of the token, so the cache doesn't hold usable tokens """
+    settings = get_settings()
+    return TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl)
+
+
+def decode_claims(token: str) -> dict:
+    """ Claims of the token after the signature and expiration are verified, raises JWTError otherwise """
+    cache = get_token_cache()
+    key = hashlib.sha256(token.encode()).digest()
+    payload = cache.get(key)
+    if payload is None:
         payload = jwt.decode(token, get_settings().jwt_secret,
                              algorithms=[get_settings().algorithm])
+        ttl = cache.ttl
+        if isinstance(payload.get('exp'), (int, float)):
+            # Expired tokens must fail verification again
+            ttl = min(ttl, payload['exp'] - time.time())
+        cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def decode_token(token: str) -> str:
+    try:
+        payload = decode_claims(token)
         user_id: str = payload.get('user_id')
         token_type: str = payload.get('token_type')
         if user_id is None:
@@ -0,0 +1,83 @@
+import time
+import threading
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency.
+
+    Closed: calls pass, `failure_threshold` consecutive failures open the breaker.
+    Open: calls are rejected for `reset_timeout` seconds.
+    Half-open: one trial call passes, its success closes the breaker and its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def allow(self) -> bool:
+        """ Whether a call may go through now. Every allowed call must be followed by record_success or record_failure """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected_total += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened_total += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def record_ignored(self) -> None:
+        """ The call ended with an outcome which says nothing about the dependency's health """
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in': round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+                if state == self.OPEN else 0,
+                'opened_total': self.opened_total,
+                'rejected_total': self.rejected_total,
+            }
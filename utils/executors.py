@@ -0,0 +1,98 @@
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import record
+
+
+class ExecutorBusy(Exception):
+    """
+    Raised when the executor queue is full and the call was rejected.
+    """
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work called from async code.
+
+    At most `max_workers` calls run at the same time and at most `max_queue` calls wait for a worker,
+    further calls are rejected with ExecutorBusy instead of piling up behind the event loop.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self._queued = 0
+        self._running = 0
+        self._queued_peak = 0
+        self._completed_total = 0
+        self._failed_total = 0
+        self._rejected_total = 0
+
+    def _call(self, submitted_at: float, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        # Time spent waiting for a free worker
+        record(f'{self.name}_queue_wait', time.monotonic() - submitted_at)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed_total += 1
+            raise
+        else:
+            with self._lock:
+                self._completed_total += 1
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run `func` in a worker thread and wait for the result without blocking the event loop.
+        Context variables of the caller are visible inside `func`.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected_total += 1
+                raise ExecutorBusy(f"{self.name}: {self._queued} calls are already waiting.")
+            self._queued += 1
+            self._queued_peak = max(self._queued_peak, self._queued)
+
+        context = contextvars.copy_context()
+        future = self._executor.submit(functools.partial(context.run, self._call, time.monotonic(), func, *args, **kwargs))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The call never started, so it won't decrement the queue itself
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queued': self._queued,
+                'queued_peak': self._queued_peak,
+                'completed_total': self._completed_total,
+                'failed_total': self._failed_total,
+                'rejected_total': self._rejected_total,
+            }
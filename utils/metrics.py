@@ -0,0 +1,154 @@
+import time
+import bisect
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # The last counter is for values above every bucket
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """ Upper bound of the bucket holding the q-quantile, the max for values above every bucket """
+        with self._lock:
+            if not self._count:
+                return None
+            rank = q * self._count
+            seen = 0
+            for bound, count in zip(self.buckets, self._counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return self._max
+
+    def stats(self) -> dict:
+        p50, p95, p99 = self.quantile(0.5), self.quantile(0.95), self.quantile(0.99)
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets['+Inf'] = self._count
+            return {
+                'count': self._count,
+                'sum': round(self._sum, 4),
+                'max': round(self._max, 4),
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'buckets': buckets,
+            }
+
+
+class Timings:
+    """
+    Seconds spent in each phase of one unit of work, a phase entered several times is summed up.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.phases: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def dominant(self) -> tuple[str, float] | None:
+        """ The phase which took the longest """
+        if not self.phases:
+            return None
+        return max(self.phases.items(), key=lambda item: item[1])
+
+    def as_dict(self) -> dict:
+        return {name: round(seconds, 4) for name, seconds in self.phases.items()}
+
+
+# Timings collected by the code running now, innermost last. Worker threads started
+# with a copy of the context (see BoundedExecutor.run) add to the same objects.
+_active_timings: ContextVar[tuple] = ContextVar('active_timings', default=())
+
+
+@contextmanager
+def track() -> Iterator[Timings]:
+    """ Collect timings of the phases run inside the `with` block, nested blocks collect their own as well """
+    timings = Timings()
+    previous = _active_timings.get()
+    _active_timings.set(previous + (timings,))
+    try:
+        yield timings
+    finally:
+        _active_timings.set(previous)
+
+
+def record(name: str, seconds: float) -> None:
+    """ Add a measured phase to every tracked unit of work and to the process histograms """
+    for timings in _active_timings.get():
+        timings.add(name, seconds)
+    get_histograms().observe(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """ Time the `with` block as phase `name` """
+    started_at = time.monotonic()
+    try:
+        yield
+    finally:
+        record(name, time.monotonic() - started_at)
+
+
+class Histograms:
+    """
+    Histograms by name, created on first observation.
+    """
+
+    def __init__(self):
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            return self._histograms[name]
+
+    def observe(self, name: str, value: float) -> None:
+        self.get(name).observe(value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.stats() for name, histogram in sorted(histograms.items())}
+
+
+@lru_cache
+def get_histograms() -> Histograms:
+    """ Process-wide histograms of phase durations in seconds """
+    return Histograms()
@@ -0,0 +1,46 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import Column, literal, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """ Opaque cursor of a row in (created_at, id) order """
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{id}'.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """ Position of the row the cursor points to, raises ValueError for invalid cursors """
+    created_at, id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(id)
+
+
+async def fetch_page(session: AsyncSession, query: Select, created_at: Column, id: Column, first: int,
+                     after: str | None = None, descending: bool = False) -> tuple[list, bool]:
+    """
+    Keyset pagination: the rows of the query after the cursor in (created_at, id) order. The rows are found
+    by the position of the cursor, however deep the page is, with an index on (created_at, id).
+
+    :param session: An instance of AsyncSession for executing asynchronous database operations.
+    :param query: Select of the rows.
+    :param created_at: Column the rows are ordered by.
+    :param id: Unique column which breaks ties of created_at.
+    :param first: Rows in the page.
+    :param after: Cursor of the last row of the previous page.
+    :param descending: Newest rows first.
+
+    :return: Rows of the page and whether there are rows after it.
+    """
+    if after is not None:
+        position = tuple_(*map(literal, decode_cursor(after)))
+        key = tuple_(created_at, id)
+        query = query.where(key < position if descending else key > position)
+    if descending:
+        query = query.order_by(created_at.desc(), id.desc())
+    else:
+        query = query.order_by(created_at, id)
+    result = await session.execute(query.limit(first + 1))
+    rows = result.scalars().all()
+    return rows[:first], len(rows) > first
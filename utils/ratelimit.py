@@ -0,0 +1,72 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """ Take tokens if there are enough of them, never waits """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def refund(self, tokens: float = 1) -> None:
+        """ Give back tokens taken for work which didn't happen """
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class KeyedTokenBuckets:
+    """
+    One TokenBucket per key. At most `maxsize` buckets are kept, the least recently used one is dropped,
+    which is the same as starting that key with a full bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float, maxsize: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def try_acquire(self, key: Hashable, tokens: float = 1) -> bool:
+        return self.get(key).try_acquire(tokens)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
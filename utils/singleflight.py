@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple
+
+
+class _Call(NamedTuple):
+    future: asyncio.Future
+    tag: Any
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the work,
+    callers arriving while it is in flight await the same result.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable], tag: Any = None,
+                 can_share: Callable[[Any], bool] | None = None) -> tuple[Any, bool]:
+        """
+        Run `func()` unless a call with the same key is already in flight.
+
+        :param key: Key identifying identical calls.
+        :param func: Coroutine function doing the work.
+        :param tag: Parameters of this call which are not part of the key.
+        :param can_share: Predicate over the tag of the running call, tells whether its result suits this caller.
+
+        :return: The result and whether it was shared from another caller's call.
+        """
+        call = self._calls.get(key)
+        if call is not None and (can_share is None or can_share(call.tag)):
+            self.followers += 1
+            return await asyncio.shield(call.future), True
+
+        self.leaders += 1
+        call = _Call(asyncio.ensure_future(func()), tag)
+        self._calls[key] = call
+        call.future.add_done_callback(lambda future: self._done(key, call))
+        # Shielded, so a leader which gives up doesn't cancel the work for its followers
+        return await asyncio.shield(call.future), False
+
+    def _done(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.future.cancelled():
+            # Mark the exception as retrieved in case every caller has gone away
+            call.future.exception()
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'followers': self.followers,
+        }